@@ -0,0 +1,442 @@
+"""
+Benchmark Hermes against a local fake Overseerr.
+
+Starts fake_overseerr.FakeOverseerr with N synthetic users, points the async
+Overseerr client and the bot's command handlers at it, and reports latency
+percentiles, throughput and upstream request counts per scenario as JSON.
+
+Scenarios:
+    find_user.cold                    first lookup with empty caches (full directory fetch)
+    find_user.revalidate              lookup with fresh=True (ETag revalidation of every page)
+    find_user.warm                    lookup served from the cached directory
+    find_user_by_discord_id.cold      reverse lookup before the Discord ID index is built
+    find_user_by_discord_id.indexed   reverse lookup once the index is built
+    update_user_notifications         link a new Discord ID to a random user
+    command.link/done/status/unlink   full !link -> !done -> !status -> !unlink flow per user
+    webhook.idle                      Overseerr webhook about a user with no pending link
+    webhook.link                      !link, then a webhook completes the verification (no !done)
+
+Usage:
+    python benchmark.py --users 1000 10000 --latency-ms 5 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import Counter
+from types import SimpleNamespace
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# config.py refuses to load without credentials, and the bot must not pick up
+# optional servers or a persistent store from a local .env
+os.environ["OVERSEERR_API_KEY"] = "benchmark"
+os.environ["BOT_TOKEN"] = "benchmark"
+os.environ["PENDING_STORE"] = "memory"
+os.environ["WEBHOOK_ENABLED"] = "false"
+os.environ["METRICS_ENABLED"] = "false"
+
+import bot as hermes  # noqa: E402
+import metrics  # noqa: E402
+from fake_overseerr import FakeOverseerr  # noqa: E402
+from overseerr_client import AsyncOverseerrClient  # noqa: E402
+from overseerr_executor import ExecutorOverseerrClient  # noqa: E402
+from singleflight import SingleFlight  # noqa: E402
+from user_directory import DiscordIndex, TTLCache, UserDirectory  # noqa: E402
+from webhook import WebhookReceiver  # noqa: E402
+
+logger = logging.getLogger("hermes-benchmark")
+
+COMMANDS = ("link", "done", "status", "unlink")
+
+
+class FakeContext:
+    """Minimal stand-in for a discord.py command context in a DM."""
+
+    def __init__(self, discord_id: int):
+        self.author = SimpleNamespace(id=discord_id)
+        self.guild = None
+        self.messages: List[str] = []
+
+    async def send(self, content: Optional[str] = None, **kwargs):
+        self.messages.append(content)
+
+    async def reply(self, content: Optional[str] = None, **kwargs):
+        self.messages.append(content)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the nearest-rank percentile of `values` (which must be non-empty)."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], upstream: List[int], errors: int, wall: float,
+              concurrency: int, server_requests: Optional[Counter] = None) -> Dict:
+    """Build the JSON report for one scenario."""
+    ops = len(latencies)
+    if not ops:
+        return {"ops": 0, "errors": errors}
+    report = {
+        "ops": ops,
+        "errors": errors,
+        "concurrency": concurrency,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / ops * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3),
+        "throughput_ops": round(ops / wall, 2) if wall else None,
+        "upstream_requests_per_op": round(sum(upstream) / ops, 2),
+        "upstream_requests_max": max(upstream),
+    }
+    if server_requests is not None:
+        report["server_requests"] = dict(server_requests)
+    return report
+
+
+class Scenario:
+    """Collects latency and upstream request samples for one named scenario."""
+
+    def __init__(self, name: str, concurrency: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.latencies: List[float] = []
+        self.upstream: List[int] = []
+        self.errors = 0
+
+    async def measure(self, op: Callable[[], Awaitable]):
+        """Run and time one operation, counting the Overseerr requests it makes."""
+        counter = metrics.start_command_scope()
+        start = time.perf_counter()
+        try:
+            await op()
+        except Exception:
+            self.errors += 1
+            logger.exception(f"{self.name} failed")
+            return
+        self.latencies.append(time.perf_counter() - start)
+        self.upstream.append(counter[0])
+
+
+class Benchmark:
+    """Runs every scenario against one fake Overseerr instance."""
+
+    def __init__(self, fake: FakeOverseerr, client: AsyncOverseerrClient, args: argparse.Namespace):
+        self.fake = fake
+        self.client = client
+        self.args = args
+        self._random = random.Random(args.seed)
+
+    def reset_caches(self):
+        """Drop every cached user, settings object, index entry and in-flight request."""
+        client = self.client
+        client.directory = UserDirectory(ttl=client.directory.ttl, miss_size=client.directory.not_found.maxsize,
+                                         miss_ttl=client.directory.not_found.ttl)
+        client.user_cache = TTLCache(maxsize=client.user_cache.maxsize, ttl=client.user_cache.ttl)
+        client.notification_cache = TTLCache(maxsize=client.notification_cache.maxsize,
+                                             ttl=client.notification_cache.ttl)
+        client.discord_index = DiscordIndex(miss_size=client.discord_index.unlinked.maxsize,
+                                            miss_ttl=client.discord_index.unlinked.ttl)
+        self.reset_writes()
+
+    def reset_writes(self):
+        """Forget earlier writes and in-flight requests, keeping the warm directory and index."""
+        client = self.client
+        # Writes from an earlier scenario would otherwise answer later reads for free
+        client.recent_writes = TTLCache(maxsize=client.recent_writes.maxsize, ttl=client.recent_writes.ttl)
+        client._changed_user_ids = set()
+        client._flights = SingleFlight()
+
+    def random_identifier(self) -> str:
+        user_id = self._random.randint(1, len(self.fake.users))
+        return self._random.choice((f"user{user_id}", f"user{user_id}@example.com", f"User {user_id}"))
+
+    async def run(self, name: str, count: int, concurrency: int, op: Callable[[int], Awaitable],
+                  before: Optional[Callable[[int], None]] = None) -> Dict:
+        """
+        Run `count` operations across `concurrency` workers.
+
+        Args:
+            name: Scenario name used in the report.
+            count: Number of operations.
+            concurrency: Number of operations in flight at once.
+            op: Coroutine function taking the operation index.
+            before: Untimed setup run before each operation.
+
+        Returns:
+            The scenario report.
+        """
+        scenario = Scenario(name, concurrency)
+        indexes = iter(range(count))
+
+        async def worker():
+            for i in indexes:
+                if before is not None:
+                    before(i)
+                await scenario.measure(lambda: op(i))
+
+        before_stats = Counter(self.fake.stats)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+        server_requests = Counter(self.fake.stats)
+        server_requests.subtract(before_stats)
+        report = summarize(scenario.latencies, scenario.upstream, scenario.errors, wall, concurrency,
+                           +server_requests)
+        logger.info(f"{len(self.fake.users)} users | {name}: {json.dumps(report)}")
+        return report
+
+    async def run_commands(self, count: int, concurrency: int) -> Dict[str, Dict]:
+        """Run the !link -> !done -> !status -> !unlink flow for `count` unlinked users."""
+        unlinked = [user_id for user_id, settings in self.fake.notifications.items()
+                    if not settings.get("discordId")]
+        user_ids = self._random.sample(unlinked, min(count, len(unlinked)))
+        scenarios = {command: Scenario(f"command.{command}", concurrency) for command in COMMANDS}
+        queue = iter(enumerate(user_ids))
+
+        async def flow(i: int, user_id: int):
+            discord_id = 900000000000000000 + i
+            identifier = f"user{user_id}"
+            ctx = FakeContext(discord_id)
+            await scenarios["link"].measure(lambda: hermes.link_account.callback(ctx, identifier))
+            pending = await hermes.pending_links.aget(discord_id)
+            if pending is None:
+                raise RuntimeError(f"!link did not create a pending link: {ctx.messages[-1]!r}")
+            # The user edits their display name in Overseerr
+            self.fake.set_display_name(user_id, f"User {user_id} [{pending['code']}]")
+            await scenarios["done"].measure(lambda: hermes.complete_linking.callback(ctx))
+            # Measure !status as it runs later on, once the write from !done has left the cache
+            self.client.recent_writes.discard(user_id)
+            await scenarios["status"].measure(lambda: hermes.check_status.callback(ctx))
+            if "Linked" not in ctx.messages[-1]:
+                raise RuntimeError(f"!status did not report the link: {ctx.messages[-1]!r}")
+            await scenarios["unlink"].measure(lambda: hermes.unlink_account.callback(ctx))
+            if "Unlinked successfully" not in ctx.messages[-1]:
+                raise RuntimeError(f"!unlink failed: {ctx.messages[-1]!r}")
+
+        async def worker():
+            for i, user_id in queue:
+                try:
+                    await flow(i, user_id)
+                except Exception:
+                    logger.exception(f"Command flow for user {user_id} failed")
+
+        before_stats = Counter(self.fake.stats)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+        server_requests = Counter(self.fake.stats)
+        server_requests.subtract(before_stats)
+
+        reports = {}
+        for command, scenario in scenarios.items():
+            # Commands run back to back, so throughput is whole flows per second
+            reports[scenario.name] = summarize(scenario.latencies, scenario.upstream, scenario.errors,
+                                               wall, concurrency)
+        reports["command.flow"] = {"flows": len(user_ids), "throughput_flows": round(len(user_ids) / wall, 2),
+                                   "server_requests": dict(+server_requests)}
+        for name, report in reports.items():
+            logger.info(f"{len(self.fake.users)} users | {name}: {json.dumps(report)}")
+        return reports
+
+    async def run_webhooks(self, count: int, concurrency: int) -> Dict[str, Dict]:
+        """
+        Send Overseerr webhooks to the bot's webhook receiver.
+
+        First about users with no pending link, then about `count` users who
+        ran !link and put the code in their display name, timing each until
+        the receiver has linked them.
+        """
+        receiver = WebhookReceiver("127.0.0.1", 0, hermes.handle_webhook_event, secret="benchmark")
+        await receiver.start()
+        self.fake.webhook_url = f"http://127.0.0.1:{receiver.port}{receiver.path}"
+        self.fake.webhook_auth = "benchmark"
+        # Success DMs go nowhere
+        dm = SimpleNamespace(send=lambda *args, **kwargs: asyncio.sleep(0))
+        hermes.bot.get_user = lambda discord_id: dm
+
+        async def notify(user_id: int):
+            status = await self.fake.send_webhook(user_id)
+            if status != 202:
+                raise RuntimeError(f"Webhook receiver answered {status}")
+            await receiver.join()
+
+        async def link_via_webhook(i: int):
+            user_id = user_ids[i]
+            discord_id = 910000000000000000 + i
+            pending = await hermes.pending_links.aget(discord_id)
+            await notify(user_id)
+            if await hermes.pending_links.aget(discord_id) is not None:
+                raise RuntimeError(f"Webhook did not complete the link for user {user_id}")
+            if self.fake.notifications[user_id].get("discordId") != str(discord_id):
+                raise RuntimeError(f"Webhook linked user {user_id} to the wrong Discord ID ({pending!r})")
+
+        try:
+            reports = {"webhook.idle": await self.run(
+                "webhook.idle", count, concurrency,
+                lambda i: notify(self._random.randint(1, len(self.fake.users))))}
+
+            unlinked = [user_id for user_id, settings in self.fake.notifications.items()
+                        if not settings.get("discordId")]
+            user_ids = self._random.sample(unlinked, min(count, len(unlinked)))
+            for i, user_id in enumerate(user_ids):
+                ctx = FakeContext(910000000000000000 + i)
+                await hermes.link_account.callback(ctx, f"user{user_id}")
+                pending = await hermes.pending_links.aget(ctx.author.id)
+                if pending is None:
+                    raise RuntimeError(f"!link did not create a pending link: {ctx.messages[-1]!r}")
+                self.fake.set_display_name(user_id, f"User {user_id} [{pending['code']}]")
+            reports["webhook.link"] = await self.run("webhook.link", len(user_ids), concurrency, link_via_webhook)
+        finally:
+            del hermes.bot.get_user
+            await receiver.stop()
+
+        # The receiver handles events in its own task, outside the per-operation
+        # request counter, so take the request counts from the fake server instead
+        for report in reports.values():
+            if report["ops"]:
+                requests = report["server_requests"].get("total", 0)
+                report["upstream_requests_per_op"] = round(requests / report["ops"], 2)
+                report["upstream_requests_max"] = None
+        return reports
+
+    async def run_all(self) -> Dict[str, Dict]:
+        """Run every selected scenario and return their reports by name."""
+        args = self.args
+        client = self.client
+        linked = self.fake.linked_discord_ids()
+        selected = lambda name: not args.scenarios or any(name.startswith(s) for s in args.scenarios)  # noqa: E731
+        results = {}
+
+        if selected("find_user.cold"):
+            results["find_user.cold"] = await self.run(
+                "find_user.cold", args.cold_iterations, 1,
+                lambda i: client.find_user(self.random_identifier()), before=lambda i: self.reset_caches())
+        if selected("find_user.revalidate"):
+            await client.refresh_directory(force=True)
+            results["find_user.revalidate"] = await self.run(
+                "find_user.revalidate", args.cold_iterations, 1,
+                lambda i: client.find_user(self.random_identifier(), fresh=True))
+        if selected("find_user.warm"):
+            await client.refresh_directory(force=True)
+            results["find_user.warm"] = await self.run(
+                "find_user.warm", args.iterations, args.concurrency,
+                lambda i: client.find_user(self.random_identifier()))
+
+        if linked and selected("find_user_by_discord_id.cold"):
+            results["find_user_by_discord_id.cold"] = await self.run(
+                "find_user_by_discord_id.cold", args.cold_iterations, 1,
+                lambda i: client.find_user_by_discord_id(self._random.choice(linked)),
+                before=lambda i: self.reset_caches())
+        if linked and selected("find_user_by_discord_id.indexed"):
+            self.reset_caches()
+            await client.refresh_discord_index()
+            results["find_user_by_discord_id.indexed"] = await self.run(
+                "find_user_by_discord_id.indexed", args.iterations, args.concurrency,
+                lambda i: client.find_user_by_discord_id(self._random.choice(linked)))
+
+        if selected("update_user_notifications"):
+            self.reset_writes()
+            results["update_user_notifications"] = await self.run(
+                "update_user_notifications", args.iterations, args.concurrency,
+                lambda i: client.update_user_notifications(
+                    self._random.randint(1, len(self.fake.users)), str(800000000000000000 + i), enable=True))
+
+        if selected("command"):
+            self.reset_caches()
+            results.update(await self.run_commands(args.iterations, args.concurrency))
+
+        if selected("webhook"):
+            self.reset_writes()
+            results.update(await self.run_webhooks(args.iterations, args.concurrency))
+
+        return results
+
+
+async def benchmark_scale(users: int, args: argparse.Namespace) -> Dict:
+    """Start a fake Overseerr with `users` users and run the scenarios against it."""
+    started = time.perf_counter()
+    fake = FakeOverseerr(users=users, latency=args.latency_ms / 1000, linked_fraction=args.linked,
+                         error_rate=args.error_rate, seed=args.seed)
+    await fake.start()
+    logger.info(f"Fake Overseerr with {users} users at {fake.base_url()} "
+                f"(generated in {time.perf_counter() - started:.1f}s)")
+
+    client_class = ExecutorOverseerrClient if args.executor else AsyncOverseerrClient
+    client = client_class(base_url=fake.base_url(), page_size=args.page_size)
+    await client.start()
+    # The command handlers use the bot module's client
+    hermes.overseerr = client
+    try:
+        results = await Benchmark(fake, client, args).run_all()
+    finally:
+        await client.close()
+        await fake.stop()
+    return {"users": users, "scenarios": results}
+
+
+async def main_async(args: argparse.Namespace) -> Dict:
+    report = {
+        "config": {
+            "latency_ms": args.latency_ms,
+            "iterations": args.iterations,
+            "cold_iterations": args.cold_iterations,
+            "concurrency": args.concurrency,
+            "linked_fraction": args.linked,
+            "error_rate": args.error_rate,
+            "page_size": args.page_size,
+            "executor": args.executor,
+            "page_concurrency": hermes.overseerr.page_concurrency,
+            "notification_concurrency": hermes.overseerr.notification_concurrency,
+            "seed": args.seed,
+        },
+        "results": [],
+    }
+    for users in args.users:
+        report["results"].append(await benchmark_scale(users, args))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Hermes against a fake Overseerr.")
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 10000],
+                        help="Directory sizes to benchmark (e.g. 1000 10000 100000)")
+    parser.add_argument("--latency-ms", type=float, default=5, help="Latency added to every fake Overseerr response")
+    parser.add_argument("--iterations", type=int, default=200, help="Operations per warm scenario")
+    parser.add_argument("--cold-iterations", type=int, default=5,
+                        help="Operations per cold scenario (each refetches the whole directory)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Operations in flight at once for warm scenarios")
+    parser.add_argument("--linked", type=float, default=0.1, help="Fraction of users with a Discord ID")
+    parser.add_argument("--error-rate", type=float, default=0,
+                        help="Fraction of fake Overseerr responses that are 429/503 errors")
+    parser.add_argument("--page-size", type=int, default=hermes.config.OVERSEERR_PAGE_SIZE,
+                        help="Users per /user page")
+    parser.add_argument("--executor", action="store_true",
+                        help="Send requests with the executor-mode client instead of aiohttp")
+    parser.add_argument("--scenarios", nargs="*", help="Only run scenarios starting with these names")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--verbose", action="store_true", help="Show the bot's own log output")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    report = asyncio.run(main_async(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        logger.info(f"Wrote {args.output}")
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,16 +10,29 @@ Set ALLOW_GUILD_COMMANDS=true in .env to allow commands in guild channels.
 
 import logging
 import asyncio
+import io
+import math
+import os
+import socket
 import time
 import string
 import random
-from typing import Dict
+from typing import Literal, Optional
 
 import discord
+from discord import app_commands
 from discord.ext import commands
 
+import bulk_links
 import config
-from overseerr_api import find_user, find_user_by_discord_id, update_user_notifications
+import metrics
+from command_limiter import CommandInProgress, CommandRateLimited, UserCommandLimiter
+from overseerr_client import AsyncOverseerrClient, REQUEST_ERRORS
+from overseerr_executor import ExecutorOverseerrClient
+from pending_store import create_pending_store
+from resilience import OverseerrUnavailableError
+from shared_state import LeaseLostError, create_shared_state
+from webhook import WebhookReceiver
 
 # Logging setup
 logging.basicConfig(
@@ -28,14 +41,139 @@ logging.basicConfig(
 )
 logger = logging.getLogger('hermes-bot')
 
+# Overseerr client (HTTP session is opened in setup_hook and closed with the bot).
+# In executor mode requests go through the requests-based client on a thread pool
+overseerr = ExecutorOverseerrClient() if config.OVERSEERR_EXECUTOR_MODE else AsyncOverseerrClient()
+
+
+class HermesBot(commands.Bot):
+    """Bot that closes the Overseerr client's HTTP session on shutdown."""
+
+    async def close(self):
+        if webhook_receiver is not None:
+            await webhook_receiver.stop()
+        if metrics_server is not None:
+            await metrics_server.stop()
+        await save_directory_snapshot()
+        await overseerr.close()
+        pending_links.close()
+        if shared_state is not None:
+            shared_state.close()
+        await super().close()
+
+    async def on_command_error(self, ctx, error):
+        """Tell the user when a command was refused or failed because Overseerr is unavailable."""
+        # Slash commands that raise skip the after_invoke hook
+        finish_command(ctx)
+        # Slash invocations wrap the error twice (HybridCommandError, then CommandInvokeError)
+        original = error
+        while getattr(original, 'original', None) is not None:
+            original = original.original
+        if isinstance(original, CommandInProgress):
+            metrics.COMMANDS_REJECTED.inc(reason="in_progress")
+            await ctx.send(f"⏳ Still working on your `{original.command}` command, please wait for it to finish.")
+            return
+        if isinstance(original, CommandRateLimited):
+            metrics.COMMANDS_REJECTED.inc(reason="rate_limited")
+            # Slash commands were deferred and must be answered; prefix commands only once
+            if original.notify or ctx.interaction is not None:
+                await ctx.send(
+                    f"You're sending commands too quickly. "
+                    f"Please try again in {math.ceil(original.retry_after)} seconds."
+                )
+            return
+        if isinstance(original, OverseerrUnavailableError):
+            logger.warning(f"!{ctx.command} failed because Overseerr is unavailable: {original}")
+            await ctx.send(overseerr_unavailable_message(original))
+            return
+        await super().on_command_error(ctx, error)
+        if ctx.interaction is not None:
+            # The interaction was deferred; without a reply Discord reports that the bot did not respond
+            try:
+                await ctx.send("❌ Something went wrong running that command. Please try again later.")
+            except discord.HTTPException as e:
+                logger.warning(f"Could not report a failed /{ctx.command} to the user: {e}")
+
+
+class ShardedHermesBot(HermesBot, commands.AutoShardedBot):
+    """HermesBot that runs several gateway shards in one process."""
+
+
+def create_bot() -> HermesBot:
+    """
+    Create the bot with the intents and caches for the configured footprint.
+
+    Without the message content intent, prefix commands only work in DMs,
+    where Discord always delivers message content; slash commands work
+    everywhere. In LOW_FOOTPRINT_MODE only the gateway events the link flow
+    uses are requested, and members, guild chunks and messages are not cached
+    (the bot never looks any of them up). With SHARD_COUNT set the bot is
+    sharded, running either every shard or just SHARD_IDS.
+    """
+    options = {}
+    if config.LOW_FOOTPRINT_MODE:
+        intents = discord.Intents.none()
+        intents.guilds = True
+        intents.dm_messages = True
+        intents.guild_messages = config.ALLOW_GUILD_COMMANDS
+        options.update(
+            member_cache_flags=discord.MemberCacheFlags.none(),
+            chunk_guilds_at_startup=False,
+            max_messages=None,
+        )
+    else:
+        intents = discord.Intents.default()
+    intents.message_content = config.MESSAGE_CONTENT_INTENT
+
+    if not config.SHARD_COUNT:
+        return HermesBot(command_prefix='!', intents=intents, help_command=None, **options)
+    if config.SHARD_COUNT != 'auto':
+        options['shard_count'] = int(config.SHARD_COUNT)
+        if config.SHARD_IDS:
+            options['shard_ids'] = config.SHARD_IDS
+    return ShardedHermesBot(command_prefix='!', intents=intents, help_command=None, **options)
+
+
+def format_memory() -> str:
+    """Describe the process's resident memory for the logs."""
+    rss = metrics.resident_memory_bytes()
+    return "unknown" if rss is None else f"{rss / (1024 * 1024):.1f} MB"
+
+
 # Bot setup
-intents = discord.Intents.default()
-intents.message_content = True
-bot = commands.Bot(command_prefix='!', intents=intents, help_command=None)
+bot = create_bot()
 
-# In-memory storage for pending link requests
+# Storage for pending link requests (in memory, or SQLite so they survive restarts)
 # Structure: {discord_id: {"identifier": str, "code": str, "ts": float, "user_id": int}}
-pending_links: Dict[int, Dict] = {}
+pending_links = create_pending_store(
+    config.PENDING_STORE, config.VERIFICATION_EXPIRY_MINUTES * 60, config.PENDING_STORE_PATH
+)
+
+# State shared with other bot processes (e.g. shards): one process holds the
+# directory sync lease and publishes the directory, the others load it
+shared_state = create_shared_state(config.SHARED_STATE, config.SHARED_STATE_PATH)
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}"
+DIRECTORY_SYNC_LEASE = "directory-sync"
+# Renewed at the start of every sync and, while a long sync (such as a cold
+# warm-up) runs, every third of this
+DIRECTORY_SYNC_LEASE_SECONDS = max(300, 3 * config.DIRECTORY_SYNC_SECONDS)
+# Version of the shared directory this process last loaded, and what it last published
+shared_directory_version = None
+published_directory = None
+
+# Per-user command rate limit, and one command at a time per user
+user_limiter = UserCommandLimiter(config.USER_COMMANDS_PER_MINUTE, config.USER_COMMAND_BURST)
+
+# Set when a pending link is added, waking cleanup_task if it is idle
+pending_link_added = asyncio.Event()
+
+# How long the startup warm-up of the user directory and Discord ID index
+# took, once it has finished
+warmup_seconds = None
+
+# Optional Prometheus-style /metrics endpoint (started in setup_hook)
+metrics.PENDING_LINKS.set_function(lambda: len(pending_links))
+metrics_server = metrics.MetricsServer(config.METRICS_HOST, config.METRICS_PORT) if config.METRICS_ENABLED else None
 
 
 def generate_verification_code() -> str:
@@ -45,27 +183,276 @@ def generate_verification_code() -> str:
     return f"{part1}-{part2}"
 
 
-def cleanup_expired_codes():
+async def cleanup_expired_codes():
     """Remove expired verification codes from pending_links."""
-    current_time = time.time()
-    expiry_seconds = config.VERIFICATION_EXPIRY_MINUTES * 60
-
-    expired_ids = [
-        discord_id for discord_id, data in pending_links.items()
-        if current_time - data['ts'] > expiry_seconds
-    ]
-
-    for discord_id in expired_ids:
-        del pending_links[discord_id]
+    for discord_id in await pending_links.apop_expired():
         logger.info(f"Cleaned up expired verification code for Discord ID {discord_id}")
 
 
 async def cleanup_task():
-    """Background task to periodically clean up expired verification codes."""
+    """Background task to clean up verification codes as they expire."""
     await bot.wait_until_ready()
     while not bot.is_closed():
-        cleanup_expired_codes()
-        await asyncio.sleep(60)  # Run every minute
+        await cleanup_expired_codes()
+
+        # Sleep until the next code expires, or until a code is added if there are none
+        pending_link_added.clear()
+        next_expiry = await pending_links.anext_expiry()
+        timeout = None if next_expiry is None else max(0.0, next_expiry - time.time())
+        try:
+            await asyncio.wait_for(pending_link_added.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def directory_sync_task():
+    """
+    Background task that warms up and then syncs the user directory and Discord ID index.
+
+    At startup every user and their notification settings are fetched (with
+    bounded concurrency) so the first commands hit a warm directory; if a
+    directory snapshot from a previous run is loaded first, only what changed
+    since then is fetched. After that the directory is revalidated every
+    DIRECTORY_SYNC_SECONDS, users whose updatedAt changed are re-checked, and
+    every DISCORD_INDEX_REFRESH_MINUTES a batch of the stalest index entries
+    is re-checked too. With DIRECTORY_DELTA_SYNC on, syncs between full ones
+    (every DIRECTORY_FULL_SYNC_MINUTES) only fetch recently updated users.
+
+    With shared state enabled only the process holding the sync lease talks
+    to Overseerr and publishes the result; the others load it instead.
+    """
+    global warmup_seconds
+    started = time.monotonic()
+    last_recheck = None
+    last_full_sync = None
+    last_snapshot = None
+    if config.DIRECTORY_SNAPSHOT_PATH:
+        try:
+            await overseerr.load_snapshot(config.DIRECTORY_SNAPSHOT_PATH)
+        except Exception:
+            # A bad snapshot must never stop the sync loop
+            logger.exception("Could not load the directory snapshot; starting with a cold sync")
+
+    while not bot.is_closed():
+        try:
+            if shared_state is not None and not await acquire_sync_lease():
+                if await load_shared_directory() and warmup_seconds is None:
+                    warmup_seconds = time.monotonic() - started
+                    logger.info(
+                        f"User directory loaded from shared state: {len(overseerr.directory)} user(s), "
+                        f"{len(overseerr.discord_index)} linked"
+                    )
+                await asyncio.sleep(config.DIRECTORY_SYNC_SECONDS)
+                continue
+
+            start = time.monotonic()
+            recheck_due = last_recheck is None or start - last_recheck >= config.DISCORD_INDEX_REFRESH_MINUTES * 60
+            full_due = (not config.DIRECTORY_DELTA_SYNC or last_full_sync is None
+                        or start - last_full_sync >= config.DIRECTORY_FULL_SYNC_MINUTES * 60)
+            try:
+                checked = await run_holding_sync_lease(overseerr.refresh_discord_index(
+                    recheck=config.DISCORD_INDEX_RECHECK_BATCH if recheck_due else 0,
+                    delta=not full_due,
+                ))
+            except (*REQUEST_ERRORS, OverseerrUnavailableError) as e:
+                logger.error(f"Failed to sync user directory: {e}")
+            except LeaseLostError:
+                logger.warning("Lost the directory sync lease to another process; stopped syncing")
+            else:
+                if warmup_seconds is None:
+                    warmup_seconds = time.monotonic() - started
+                    logger.info(
+                        f"User directory warmed up: {len(overseerr.directory)} user(s), "
+                        f"{len(overseerr.discord_index)} linked, took {warmup_seconds:.1f}s"
+                    )
+                elif checked:
+                    logger.info(
+                        f"User directory synced: checked {checked} user(s), "
+                        f"{len(overseerr.discord_index)} linked, took {time.monotonic() - start:.1f}s"
+                    )
+                if full_due:
+                    last_full_sync = start
+                if recheck_due:
+                    last_recheck = start
+                    logger.info(f"Overseerr connection pool: {overseerr.pool_stats()}")
+                if shared_state is not None:
+                    await publish_shared_directory()
+                # Snapshot right after warm-up, then periodically
+                if last_snapshot is None or time.monotonic() - last_snapshot >= config.DIRECTORY_SNAPSHOT_MINUTES * 60:
+                    last_snapshot = time.monotonic()
+                    await save_directory_snapshot()
+        except Exception:
+            # Anything unexpected (e.g. a locked shared-state database) must never stop the sync loop
+            logger.exception("Directory sync failed; retrying next interval")
+        await asyncio.sleep(config.DIRECTORY_SYNC_SECONDS)
+
+
+async def acquire_sync_lease() -> bool:
+    """Take or renew the directory sync lease (on a worker thread, as the store may block)."""
+    return await asyncio.to_thread(
+        shared_state.acquire_lease, DIRECTORY_SYNC_LEASE, PROCESS_ID, DIRECTORY_SYNC_LEASE_SECONDS
+    )
+
+
+async def run_holding_sync_lease(coro):
+    """
+    Await `coro`, renewing the directory sync lease while it runs.
+
+    Without shared state this simply awaits `coro`.
+
+    Raises:
+        LeaseLostError: If the lease could not be renewed; `coro` is cancelled.
+    """
+    task = asyncio.ensure_future(coro)
+    if shared_state is None:
+        return await task
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DIRECTORY_SYNC_LEASE_SECONDS / 3)
+            if done:
+                return task.result()
+            if not await acquire_sync_lease():
+                raise LeaseLostError(DIRECTORY_SYNC_LEASE)
+    finally:
+        task.cancel()
+
+
+async def publish_shared_directory():
+    """Publish the directory and Discord ID index for other processes, if they changed."""
+    global published_directory
+    fingerprint = (
+        frozenset(overseerr.directory.etags.items()),
+        overseerr.directory.high_water_mark,
+        frozenset((user_id, discord_id) for user_id, discord_id, _ in overseerr.discord_index.entries()),
+    )
+    if fingerprint != published_directory:
+        await asyncio.to_thread(shared_state.set, "directory", await overseerr.export_state())
+        await asyncio.to_thread(shared_state.set, "directory:version", str(time.time()).encode())
+        published_directory = fingerprint
+        logger.debug("Published user directory to shared state")
+    await asyncio.to_thread(shared_state.set, "directory:synced_at", str(time.time()).encode())
+
+
+async def load_shared_directory() -> bool:
+    """
+    Load the directory published by the process holding the sync lease.
+
+    The directory is only decoded again when a new version was published; in
+    between, it is kept fresh for as long as the syncing process reports that
+    it is still revalidating it.
+
+    Returns:
+        True if a shared directory has been loaded.
+    """
+    global shared_directory_version
+    version = await asyncio.to_thread(shared_state.get, "directory:version")
+    if version is not None and version != shared_directory_version:
+        data = await asyncio.to_thread(shared_state.get, "directory")
+        if data is not None and await overseerr.load_shared_state(data):
+            shared_directory_version = version
+    synced_at = await asyncio.to_thread(shared_state.get, "directory:synced_at")
+    if shared_directory_version is not None and synced_at is not None:
+        overseerr.directory.touch(time.time() - float(synced_at))
+    return shared_directory_version is not None
+
+
+async def memory_log_task():
+    """Background task that logs resident memory every MEMORY_LOG_MINUTES."""
+    await bot.wait_until_ready()
+    while not bot.is_closed():
+        await asyncio.sleep(config.MEMORY_LOG_MINUTES * 60)
+        logger.info(
+            f"Resident memory: {format_memory()} ({len(bot.guilds)} guild(s), "
+            f"{len(bot.users)} cached user(s), {len(overseerr.directory)} Overseerr user(s))"
+        )
+
+
+async def save_directory_snapshot():
+    """Write the directory snapshot, if enabled and there is a directory to save."""
+    if not config.DIRECTORY_SNAPSHOT_PATH or overseerr.directory.loaded_at is None:
+        return
+    try:
+        await overseerr.save_snapshot(config.DIRECTORY_SNAPSHOT_PATH)
+    except OSError as e:
+        logger.error(f"Failed to save directory snapshot: {e}")
+
+
+def overseerr_unavailable_message(error: OverseerrUnavailableError) -> str:
+    """Build the message sent when a command fails because Overseerr is unavailable."""
+    if error.retry_after:
+        wait = f"in about {max(1, round(error.retry_after))} seconds"
+    else:
+        wait = "in a minute"
+    return (
+        "⚠️ Overseerr isn't responding right now, so I couldn't finish that.\n"
+        f"This is a temporary problem on the server side, not with your account. Please try again {wait}."
+    )
+
+
+def link_success_message(identifier: str, verification_code: str) -> str:
+    """Build the message sent when a Discord account is successfully linked."""
+    return (
+        f"✅ **Success!** Your Overseerr account `{identifier}` is now linked to your Discord account.\n\n"
+        f"Overseerr will now @mention you in Discord when:\n"
+        f"• Your requests are approved\n"
+        f"• Requested media is available\n"
+        f"• Other request notifications occur\n\n"
+        f"You can now remove `[{verification_code}]` from your Overseerr display name."
+    )
+
+
+async def handle_webhook_event(user_ids, identifiers):
+    """
+    Complete pending links for the Overseerr users named in a webhook event.
+
+    Only the users in the event are fetched, so a webhook costs one request
+    per affected pending link rather than a full directory scan, and nothing
+    at all while nobody has a pending link.
+    """
+    await cleanup_expired_codes()
+    if await pending_links.anext_expiry() is None:
+        return
+
+    for identifier in identifiers:
+        user = await overseerr.find_user(identifier)
+        if user:
+            user_ids.add(user['id'])
+
+    for user_id in user_ids:
+        discord_ids = await pending_links.adiscord_ids_for_user(user_id)
+        if not discord_ids:
+            continue
+
+        user = await overseerr.get_user(user_id, fresh=True)
+        if not user:
+            continue
+
+        for discord_id in discord_ids:
+            pending = await pending_links.aget(discord_id)
+            if pending is None or pending['code'] not in (user.get('displayName') or ''):
+                continue
+
+            if not await overseerr.update_user_notifications(user_id, str(discord_id), enable=True):
+                continue
+            await pending_links.apop(discord_id)
+            logger.info(f"Linked Discord ID {discord_id} to Overseerr user {user_id} via webhook")
+
+            try:
+                discord_user = bot.get_user(discord_id) or await bot.fetch_user(discord_id)
+                await discord_user.send(link_success_message(pending['identifier'], pending['code']))
+            except discord.HTTPException as e:
+                logger.warning(f"Linked Discord ID {discord_id} but could not DM them: {e}")
+
+
+# Optional Overseerr webhook receiver (started in setup_hook, by the process running shard 0)
+webhook_receiver = WebhookReceiver(
+    config.WEBHOOK_HOST, config.WEBHOOK_PORT, handle_webhook_event, secret=config.WEBHOOK_SECRET
+) if config.WEBHOOK_ENABLED and config.PRIMARY_PROCESS else None
+
+
+def _is_admin(ctx):
+    """Check if the command's author is listed in BOT_ADMIN_IDS."""
+    return ctx.author.id in config.BOT_ADMIN_IDS
 
 
 def _channel_allowed(ctx):
@@ -83,9 +470,67 @@ def _channel_allowed(ctx):
 
 @bot.event
 async def setup_hook():
-    """Setup hook to initialize background tasks before bot starts."""
+    """Setup hook to initialize the Overseerr client and background tasks before bot starts."""
+    await overseerr.start()
+    if config.SLASH_COMMANDS_SYNC and config.PRIMARY_PROCESS:
+        try:
+            synced = await bot.tree.sync()
+            logger.info(f"Synced {len(synced)} slash command(s)")
+        except discord.HTTPException as e:
+            logger.error(f"Failed to sync slash commands: {e}")
     bot.loop.create_task(cleanup_task())
     logger.info("Background cleanup task started")
+    bot.loop.create_task(directory_sync_task())
+    logger.info("User directory sync task started")
+    if config.MEMORY_LOG_MINUTES > 0:
+        bot.loop.create_task(memory_log_task())
+    if webhook_receiver is not None:
+        await webhook_receiver.start()
+    if metrics_server is not None:
+        await metrics_server.start()
+
+
+@bot.before_invoke
+async def start_command(ctx):
+    """
+    Acknowledge a command, apply the per-user limits, and start timing it and
+    counting its Overseerr requests.
+
+    Slash commands are deferred straight away (as ephemeral, so only the caller
+    sees the replies) and answered with a follow-up once the Overseerr work is
+    done, so slow upstream responses never hit Discord's 3-second interaction
+    deadline. Deferring does nothing for prefix commands.
+
+    Raises:
+        CommandInProgress: If the user already has a command running.
+        CommandRateLimited: If the user is sending commands too quickly.
+    """
+    await ctx.defer(ephemeral=True)
+    user_limiter.acquire(ctx.author.id, f"{ctx.prefix}{ctx.command.qualified_name}")
+    ctx.metrics_start = time.perf_counter()
+    ctx.metrics_upstream = metrics.start_command_scope()
+
+
+@bot.after_invoke
+async def end_command(ctx):
+    """Finish a command that ran to completion."""
+    finish_command(ctx)
+
+
+def finish_command(ctx):
+    """
+    Release a started command's per-user slot and record its latency and
+    Overseerr request count. Does nothing if the command never started or was
+    already finished.
+    """
+    if getattr(ctx, 'metrics_start', None) is None:
+        return
+    user_limiter.release(ctx.author.id)
+    command = ctx.command.qualified_name
+    status = "error" if ctx.command_failed else "ok"
+    metrics.COMMAND_DURATION.observe(time.perf_counter() - ctx.metrics_start, command=command, status=status)
+    metrics.COMMAND_UPSTREAM_REQUESTS.observe(ctx.metrics_upstream[0], command=command)
+    ctx.metrics_start = None
 
 
 @bot.event
@@ -93,13 +538,21 @@ async def on_ready():
     """Event handler for when the bot is ready."""
     logger.info(f'Logged in as {bot.user.name} (ID: {bot.user.id})')
     logger.info(f'Connected to {len(bot.guilds)} guild(s)')
+    logger.info(f'Resident memory: {format_memory()} ({len(bot.users)} cached user(s))')
+    if warmup_seconds is not None:
+        logger.info(
+            f'User directory: {len(overseerr.directory)} user(s), {len(overseerr.discord_index)} linked '
+            f'(warmed up in {warmup_seconds:.1f}s)'
+        )
+    else:
+        logger.info(f'User directory warm-up still running ({len(overseerr.directory)} user(s) loaded so far)')
     if config.ALLOW_GUILD_COMMANDS:
         logger.info('Bot is ready to accept commands (DMs and guild channels)')
     else:
         logger.info('Bot is ready to accept commands (DMs ONLY)')
 
 
-@bot.command(name='help')
+@bot.hybrid_command(name='help')
 async def help_command(ctx):
     """Show help information for Hermes."""
     if not _channel_allowed(ctx):
@@ -123,6 +576,8 @@ Link your Discord account to Overseerr so you can be @mentioned in notifications
 
 `!help` - Show this help message
 
+Every command is also available as a slash command (e.g. `/link`).
+
 **How to Link:**
 1. DM me: `!link YourUsername`
 2. I'll give you a verification code like [ABCD-1234]
@@ -130,14 +585,16 @@ Link your Discord account to Overseerr so you can be @mentioned in notifications
 4. Come back here and type `!done`
 
 **Privacy:**
-All commands must be sent via DM. Your Discord ID is only stored in Overseerr so Overseerr can @mention you when your requests are approved or available.
+All commands must be sent via DM.
+Your Discord ID is stored in Overseerr so it can @mention you when your requests are approved or available.
 
 **Questions?** See the bot's README or contact your server administrator.
 """
     await ctx.send(help_text)
 
 
-@bot.command(name='link')
+@bot.hybrid_command(name='link')
+@app_commands.describe(identifier="Your Plex username, email, or Overseerr display name")
 async def link_account(ctx, identifier: str = None):
     """
     Create a verification request to link Discord and Overseerr accounts.
@@ -157,19 +614,20 @@ async def link_account(ctx, identifier: str = None):
     discord_id = ctx.author.id
 
     # Clean up expired codes before processing
-    cleanup_expired_codes()
+    await cleanup_expired_codes()
 
     # Check if user already has a pending link
-    if discord_id in pending_links:
-        old_code = pending_links[discord_id]['code']
+    existing = await pending_links.aget(discord_id)
+    if existing is not None:
+        old_code = existing['code']
         await ctx.send(
-            f"You already have a pending verification for `{pending_links[discord_id]['identifier']}`.\n"
+            f"You already have a pending verification for `{existing['identifier']}`.\n"
             f"Use the existing code `{old_code}` or wait {config.VERIFICATION_EXPIRY_MINUTES} minutes for it to expire."
         )
         return
 
     # Find the user in Overseerr
-    user = find_user(identifier)
+    user = await overseerr.find_user(identifier)
     if not user:
         await ctx.send(
             f"Could not find an Overseerr account matching `{identifier}`.\n"
@@ -177,8 +635,10 @@ async def link_account(ctx, identifier: str = None):
         )
         return
 
-    # Check if this Overseerr account is already linked to a Discord ID
-    existing_discord_id = user.get('settings', {}).get('notifications', {}).get('discordId')
+    # Check if this Overseerr account is already linked to a Discord ID (directory
+    # entries carry no settings; after our own writes these come from cache)
+    notifications = await overseerr.get_user_notifications(user['id']) or {}
+    existing_discord_id = notifications.get('discordId')
     if existing_discord_id:
         if existing_discord_id == str(discord_id):
             await ctx.send(f"Your Overseerr account `{identifier}` is already linked to your Discord account!")
@@ -192,14 +652,17 @@ async def link_account(ctx, identifier: str = None):
 
     # Generate verification code and store pending request
     verification_code = generate_verification_code()
-    pending_links[discord_id] = {
+    await pending_links.aset(discord_id, {
         "identifier": identifier,
         "code": verification_code,
         "ts": time.time(),
         "user_id": user['id']
-    }
+    })
+    pending_link_added.set()
 
-    logger.info(f"Created link request for Discord ID {discord_id} -> Overseerr user {identifier} (code: {verification_code})")
+    logger.info(
+        f"Created link request for Discord ID {discord_id} -> Overseerr user {identifier} (code: {verification_code})"
+    )
 
     await ctx.send(
         f"**Verification started for `{identifier}`**\n\n"
@@ -214,7 +677,7 @@ async def link_account(ctx, identifier: str = None):
     )
 
 
-@bot.command(name='done')
+@bot.hybrid_command(name='done')
 async def complete_linking(ctx):
     """
     Complete the verification and link Discord to Overseerr account.
@@ -228,31 +691,32 @@ async def complete_linking(ctx):
     discord_id = ctx.author.id
 
     # Clean up expired codes
-    cleanup_expired_codes()
+    await cleanup_expired_codes()
 
     # Check if user has a pending link request
-    if discord_id not in pending_links:
+    pending = await pending_links.aget(discord_id)
+    if pending is None:
         await ctx.send(
             "You don't have a pending verification request.\n"
             "Start by using `!link <identifier>`"
         )
         return
 
-    pending = pending_links[discord_id]
     identifier = pending['identifier']
     verification_code = pending['code']
     user_id = pending['user_id']
 
-    # Fetch the user from Overseerr to check their display name
-    user = find_user(identifier)
+    # Fetch just this user from Overseerr to check their display name (bypassing the
+    # cache, since the user has only just edited it)
+    user = await overseerr.get_user(user_id, fresh=True)
     if not user:
         await ctx.send(
             f"Could not find Overseerr account `{identifier}`. Please try again with `!link`."
         )
-        del pending_links[discord_id]
+        await pending_links.apop(discord_id)
         return
 
-    display_name = user.get('displayName', '')
+    display_name = user.get('displayName') or ''
 
     # Check if the verification code is in the display name
     if verification_code not in display_name:
@@ -264,18 +728,11 @@ async def complete_linking(ctx):
         return
 
     # Verification successful - update Discord ID in Overseerr
-    if update_user_notifications(user_id, str(discord_id), enable=True):
-        await ctx.send(
-            f"✅ **Success!** Your Overseerr account `{identifier}` is now linked to your Discord account.\n\n"
-            f"Overseerr will now @mention you in Discord when:\n"
-            f"• Your requests are approved\n"
-            f"• Requested media is available\n"
-            f"• Other request notifications occur\n\n"
-            f"You can now remove `[{verification_code}]` from your Overseerr display name."
-        )
+    if await overseerr.update_user_notifications(user_id, str(discord_id), enable=True):
+        await ctx.send(link_success_message(identifier, verification_code))
 
-        # Clean up pending request
-        del pending_links[discord_id]
+        # Clean up pending request (a webhook may already have completed it)
+        await pending_links.apop(discord_id)
     else:
         await ctx.send(
             "❌ Failed to link your accounts due to an API error.\n"
@@ -283,7 +740,8 @@ async def complete_linking(ctx):
         )
 
 
-@bot.command(name='unlink')
+@bot.hybrid_command(name='unlink')
+@app_commands.describe(identifier="The Overseerr account to unlink (defaults to the one linked to you)")
 async def unlink_account(ctx, identifier: str = None):
     """
     Remove the Discord ID link from your Overseerr account.
@@ -297,7 +755,7 @@ async def unlink_account(ctx, identifier: str = None):
     if not identifier:
         # Try to find by Discord ID if no identifier provided
         discord_id = str(ctx.author.id)
-        user = find_user_by_discord_id(discord_id)
+        user = await overseerr.find_user_by_discord_id(discord_id)
 
         if not user:
             await ctx.send(
@@ -309,7 +767,7 @@ async def unlink_account(ctx, identifier: str = None):
         identifier = user.get('plexUsername', 'Unknown')
     else:
         # Find user by provided identifier
-        user = find_user(identifier)
+        user = await overseerr.find_user(identifier)
         if not user:
             await ctx.send(
                 f"Could not find Overseerr account matching `{identifier}`.\n"
@@ -318,7 +776,8 @@ async def unlink_account(ctx, identifier: str = None):
             return
 
         # Verify this user is linked to the caller's Discord ID
-        linked_discord_id = user.get('settings', {}).get('notifications', {}).get('discordId')
+        notifications = await overseerr.get_user_notifications(user['id']) or {}
+        linked_discord_id = notifications.get('discordId')
         if linked_discord_id != str(ctx.author.id):
             await ctx.send(
                 f"The Overseerr account `{identifier}` is not linked to your Discord account.\n"
@@ -329,7 +788,7 @@ async def unlink_account(ctx, identifier: str = None):
     user_id = user['id']
 
     # Remove the Discord ID
-    if update_user_notifications(user_id, None, enable=False):
+    if await overseerr.update_user_notifications(user_id, None, enable=False):
         await ctx.send(
             f"🔓 **Unlinked successfully!**\n\n"
             f"Your Overseerr account `{identifier}` is no longer linked to Discord.\n"
@@ -344,7 +803,7 @@ async def unlink_account(ctx, identifier: str = None):
         )
 
 
-@bot.command(name='status')
+@bot.hybrid_command(name='status')
 async def check_status(ctx):
     """
     Check if your Discord account is currently linked to Overseerr.
@@ -358,8 +817,8 @@ async def check_status(ctx):
     discord_id = str(ctx.author.id)
 
     # Check if user has a pending link
-    if ctx.author.id in pending_links:
-        pending = pending_links[ctx.author.id]
+    pending = await pending_links.aget(ctx.author.id)
+    if pending is not None:
         await ctx.send(
             f"📋 **Pending Verification**\n\n"
             f"Identifier: `{pending['identifier']}`\n"
@@ -370,7 +829,7 @@ async def check_status(ctx):
         return
 
     # Check if user is already linked
-    user = find_user_by_discord_id(discord_id)
+    user = await overseerr.find_user_by_discord_id(discord_id)
     if user:
         identifier = user.get('plexUsername') or user.get('email') or 'Unknown'
         await ctx.send(
@@ -387,14 +846,121 @@ async def check_status(ctx):
         )
 
 
+@bot.hybrid_command(name='bulklink')
+@app_commands.describe(
+    file="CSV or JSON file with identifier and discordId columns",
+    report="Report from an interrupted import, to resume it",
+)
+async def bulk_link(ctx, file: discord.Attachment, report: Optional[discord.Attachment] = None):
+    """
+    Link many Overseerr accounts at once (admins only).
+
+    Usage: !bulklink with the import file attached (and a previous report to resume)
+    """
+    if not _channel_allowed(ctx):
+        await ctx.reply("For privacy, please DM me this command instead.")
+        return
+    if not _is_admin(ctx):
+        await ctx.send("This command is only available to Hermes admins.")
+        return
+
+    try:
+        rows = bulk_links.parse_link_rows((await file.read()).decode('utf-8-sig'), file.filename)
+    except (bulk_links.BulkLinkError, UnicodeDecodeError) as e:
+        await ctx.send(f"❌ Could not read `{file.filename}`: {e}")
+        return
+
+    # The new report repeats the previous one, so it can resume a later interruption too
+    buffer = io.StringIO()
+    previous = {}
+    if report is not None:
+        previous_report = (await report.read()).decode('utf-8', errors='replace')
+        previous = bulk_links.parse_report(previous_report)
+        buffer.write(''.join(line + '\n' for line in previous_report.splitlines() if line))
+    # Progress only counts rows handled in this run, not those carried over from the report
+    resumed_lines = len(buffer.getvalue().splitlines())
+    to_import = len(bulk_links.pending_rows(rows, previous))
+    resumed_note = f" ({len(rows) - to_import} already done)" if to_import < len(rows) else ""
+
+    logger.info(f"Bulk link import of {len(rows)} row(s) from {file.filename} started by Discord ID {ctx.author.id}")
+    progress = await ctx.send(f"Importing {to_import} row(s) from `{file.filename}`{resumed_note}...")
+    report_name = f"{file.filename}.report.jsonl"
+    task = asyncio.ensure_future(bulk_links.run_import(overseerr, rows, buffer, previous))
+    try:
+        while not task.done():
+            await asyncio.wait({task}, timeout=5)
+            if not task.done():
+                done = len(buffer.getvalue().splitlines()) - resumed_lines
+                await progress.edit(
+                    content=f"Importing `{file.filename}`: {done}/{to_import} row(s) done{resumed_note}..."
+                )
+        totals = task.result()
+    except BaseException:
+        # Hand over the partial report so the import can be resumed
+        logger.exception(f"Bulk link import from {file.filename} stopped early")
+        try:
+            await asyncio.shield(ctx.send(
+                "❌ **Bulk import stopped early.** Run `!bulklink` again with this report attached to resume.",
+                file=discord.File(io.BytesIO(buffer.getvalue().encode()), filename=report_name),
+            ))
+        except discord.HTTPException as e:
+            logger.error(f"Could not send the partial bulk import report: {e}")
+        raise
+    finally:
+        task.cancel()
+
+    logger.info(f"Bulk link import from {file.filename} finished: {bulk_links.summarize(totals)}")
+    failed_note = ""
+    if totals['failed']:
+        failed_note = "\nRun `!bulklink` again with this report attached to retry the failed rows."
+    await ctx.send(
+        f"**Bulk import finished** ({bulk_links.summarize(totals)}){failed_note}",
+        file=discord.File(io.BytesIO(buffer.getvalue().encode()), filename=report_name),
+    )
+
+
+@bot.hybrid_command(name='bulkexport')
+@app_commands.describe(file_format="File format (csv can be imported again with bulklink)")
+async def bulk_export(ctx, file_format: Literal['csv', 'json'] = 'csv'):
+    """
+    Export every linked Overseerr account (admins only).
+
+    Usage: !bulkexport [csv|json]
+    """
+    if not _channel_allowed(ctx):
+        await ctx.reply("For privacy, please DM me this command instead.")
+        return
+    if not _is_admin(ctx):
+        await ctx.send("This command is only available to Hermes admins.")
+        return
+
+    rows = await bulk_links.export_links(overseerr)
+    data = bulk_links.format_export(rows, as_json=file_format == 'json')
+    await ctx.send(
+        f"**{len(rows)} linked account(s)**",
+        file=discord.File(io.BytesIO(data.encode()), filename=f"hermes-links.{file_format}"),
+    )
+
+
 if __name__ == "__main__":
     logger.info("Starting Hermes (Overseerr Discord Link Bot)")
     logger.info(f"Overseerr API URL: {config.OVERSEERR_BASE_URL}")
     logger.info(f"Verification code expiry: {config.VERIFICATION_EXPIRY_MINUTES} minutes")
+    if config.LOW_FOOTPRINT_MODE:
+        logger.info("Low-footprint mode: minimal intents, no member or message cache")
+    logger.info(f"Resident memory at startup: {format_memory()}")
     if config.ALLOW_GUILD_COMMANDS:
         logger.info("Privacy mode: Commands allowed in DMs and guild channels")
     else:
         logger.info("Privacy mode: Commands allowed in DMs ONLY")
+    if config.SHARD_COUNT:
+        shards = ', '.join(map(str, config.SHARD_IDS)) if config.SHARD_IDS else 'all'
+        logger.info(f"Sharding: {config.SHARD_COUNT} shard(s) in total, running {shards}")
+        if not config.PRIMARY_PROCESS:
+            logger.info("Not running shard 0: the webhook receiver and slash command sync are left to that process")
+    if shared_state is not None and config.PENDING_STORE == 'memory':
+        logger.warning("SHARED_STATE is enabled but PENDING_STORE=memory; pending verifications "
+                       "will not be shared with other processes")
 
     # Run the bot (background task starts via setup_hook)
     try:
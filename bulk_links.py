@@ -0,0 +1,352 @@
+"""
+Bulk import and export of Discord links.
+
+Imports apply a CSV or JSON file of (identifier, discordId) rows in one go,
+for onboarding a whole community without everyone linking by DM. Every
+identifier is resolved against a single fetch of the user directory, and the
+notification-settings writes run with bounded concurrency through the
+client's shared rate limiter.
+
+Each row's result is appended to a JSON Lines report as soon as it is known.
+Passing the same report back in resumes an interrupted import: rows it
+already records (other than failures) are skipped.
+
+Used by the bot's admin commands, or directly:
+
+    python bulk_links.py import links.csv --report links.report.jsonl
+    python bulk_links.py export links.csv
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import logging
+import re
+from collections import Counter
+from typing import AsyncIterator, Dict, IO, Iterable, List, Optional, Set, Tuple
+
+from config import BULK_LINK_CONCURRENCY
+from overseerr_client import AsyncOverseerrClient
+
+logger = logging.getLogger(__name__)
+
+# Discord snowflakes are 17-20 digit integers
+DISCORD_ID_PATTERN = re.compile(r"^\d{17,20}$")
+
+# Column names accepted for each field, in order of preference
+IDENTIFIER_COLUMNS = ("identifier", "plexUsername", "email", "username")
+DISCORD_ID_COLUMNS = ("discordId", "discord_id", "discord")
+
+# Discord ID value that unlinks the account (an empty value is an error)
+UNLINK = "unlink"
+
+# Report statuses that are final; anything else is retried on resume
+DONE_STATUSES = frozenset({"linked", "unlinked", "unchanged", "not_found", "invalid", "duplicate"})
+
+EXPORT_FIELDS = ("identifier", "discordId", "userId", "email", "displayName")
+
+# (row number, identifier, Discord ID or "unlink", as written in the file)
+LinkRow = Tuple[int, str, str]
+
+
+class BulkLinkError(Exception):
+    """The input file could not be read."""
+
+
+def _pick(record: Dict, columns: Iterable[str]) -> str:
+    for column in columns:
+        value = record.get(column)
+        if value not in (None, ""):
+            return str(value).strip()
+    return ""
+
+
+def parse_link_rows(data: str, filename: str = "") -> List[LinkRow]:
+    """
+    Parse an import file.
+
+    JSON files hold a list of objects; anything else is read as CSV with a
+    header row. Rows need an identifier column (identifier, plexUsername,
+    email or username) and a Discord ID column (discordId, discord_id or
+    discord). A Discord ID of "unlink" unlinks the account; an empty one is
+    reported as invalid, so a misnamed column can never unlink anyone.
+
+    Args:
+        data: File contents.
+        filename: Used to detect JSON by its extension.
+
+    Returns:
+        Rows numbered from 1, in file order.
+
+    Raises:
+        BulkLinkError: If the file cannot be parsed or lacks a Discord ID column.
+    """
+    if filename.lower().endswith(".json") or data.lstrip().startswith("["):
+        try:
+            records = json.loads(data)
+        except ValueError as e:
+            raise BulkLinkError(f"Invalid JSON: {e}")
+        if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+            raise BulkLinkError("JSON import must be a list of objects")
+        if records and not any(set(record) & set(DISCORD_ID_COLUMNS) for record in records):
+            raise BulkLinkError(f"JSON import objects need one of the keys: {', '.join(DISCORD_ID_COLUMNS)}")
+    else:
+        reader = csv.DictReader(io.StringIO(data))
+        if not reader.fieldnames or not set(reader.fieldnames) & set(IDENTIFIER_COLUMNS):
+            raise BulkLinkError(f"CSV import needs a header row with one of: {', '.join(IDENTIFIER_COLUMNS)}")
+        if not set(reader.fieldnames) & set(DISCORD_ID_COLUMNS):
+            raise BulkLinkError(f"CSV import needs a Discord ID column named one of: {', '.join(DISCORD_ID_COLUMNS)}")
+        records = list(reader)
+
+    return [
+        (number, _pick(record, IDENTIFIER_COLUMNS), _pick(record, DISCORD_ID_COLUMNS))
+        for number, record in enumerate(records, start=1)
+    ]
+
+
+def parse_report(data: str) -> Dict[int, Dict]:
+    """
+    Read a previous import report.
+
+    Args:
+        data: Report contents (JSON Lines).
+
+    Returns:
+        The last recorded result for each row number. Unreadable lines (e.g.
+        one cut off by a crash) are ignored.
+    """
+    results: Dict[int, Dict] = {}
+    for line in data.splitlines():
+        try:
+            result = json.loads(line)
+            results[int(result["row"])] = result
+        except (ValueError, KeyError, TypeError):
+            continue
+    return results
+
+
+def pending_rows(rows: List[LinkRow], report: Dict[int, Dict]) -> List[LinkRow]:
+    """Return the rows a previous report does not already record as done."""
+    pending = []
+    for row in rows:
+        number, identifier, discord_id = row
+        previous = report.get(number)
+        if (previous is not None and previous.get("status") in DONE_STATUSES
+                and previous.get("identifier") == identifier and previous.get("discordId") == discord_id):
+            continue
+        pending.append(row)
+    return pending
+
+
+async def import_links(client: AsyncOverseerrClient, rows: List[LinkRow],
+                       concurrency: int = BULK_LINK_CONCURRENCY) -> AsyncIterator[Dict]:
+    """
+    Apply link rows, yielding each row's result as soon as it is known.
+
+    The user directory is refreshed once and every identifier resolved against
+    it. Rows naming an Overseerr account or Discord ID already claimed by an
+    earlier row are reported as duplicates, and rows with no Discord ID (rather
+    than "unlink") as invalid. Rows already matching the Discord ID index are
+    reported unchanged without a write. The remaining writes run `concurrency`
+    at a time.
+
+    Args:
+        client: Started Overseerr client.
+        rows: Rows to apply.
+        concurrency: Maximum concurrent writes.
+
+    Yields:
+        Result dictionaries with "row", "identifier", "discordId", "status"
+        and, where known, "userId" and "error". Status is one of linked,
+        unlinked, unchanged, not_found, invalid, duplicate or failed.
+
+    Raises:
+        aiohttp.ClientError: If the user list cannot be fetched.
+        OverseerrUnavailableError: If Overseerr is unavailable.
+    """
+    await client.refresh_directory(force=True)
+
+    seen_users: Set[int] = set()
+    seen_discord_ids: Set[str] = set()
+    writes: List[Tuple[Dict, int, str]] = []
+
+    for number, identifier, discord_id in rows:
+        result = {"row": number, "identifier": identifier, "discordId": discord_id}
+        # The Discord ID to store, or "" to unlink
+        target = "" if discord_id.lower() == UNLINK else discord_id
+        user = client.directory.find(identifier) if identifier else None
+        if not identifier:
+            result["status"] = "invalid"
+            result["error"] = "missing identifier"
+        elif not discord_id:
+            result["status"] = "invalid"
+            result["error"] = f'missing Discord ID (use "{UNLINK}" to unlink)'
+        elif target and not DISCORD_ID_PATTERN.match(target):
+            result["status"] = "invalid"
+            result["error"] = f'Discord ID must be a 17-20 digit number or "{UNLINK}"'
+        elif user is None:
+            result["status"] = "not_found"
+        elif user["id"] in seen_users or (target and target in seen_discord_ids):
+            result["userId"] = user["id"]
+            result["status"] = "duplicate"
+        else:
+            result["userId"] = user["id"]
+            seen_users.add(user["id"])
+            if target:
+                seen_discord_ids.add(target)
+            if (user["id"] in client.discord_index
+                    and client.discord_index.discord_id_for(user["id"]) == (target or None)):
+                result["status"] = "unchanged"
+            else:
+                writes.append((result, user["id"], target))
+                continue
+        yield result
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def apply(result: Dict, user_id: int, discord_id: str) -> Dict:
+        async with semaphore:
+            if await client.update_user_notifications(user_id, discord_id or None, enable=bool(discord_id)):
+                result["status"] = "linked" if discord_id else "unlinked"
+            else:
+                result["status"] = "failed"
+                result["error"] = "Overseerr update failed"
+        return result
+
+    tasks = [asyncio.ensure_future(apply(*write)) for write in writes]
+    try:
+        for done in asyncio.as_completed(tasks):
+            yield await done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def run_import(client: AsyncOverseerrClient, rows: List[LinkRow], report: IO[str],
+                     previous: Optional[Dict[int, Dict]] = None,
+                     concurrency: int = BULK_LINK_CONCURRENCY) -> Counter:
+    """
+    Apply link rows, appending each result to a report as it completes.
+
+    Args:
+        client: Started Overseerr client.
+        rows: Every row of the import file.
+        report: Text stream the JSON Lines report is appended to.
+        previous: Results from an earlier, interrupted run of the same file;
+            rows it records as done are skipped.
+        concurrency: Maximum concurrent writes.
+
+    Returns:
+        Count of results by status (skipped rows are counted as "skipped").
+    """
+    todo = pending_rows(rows, previous or {})
+    totals = Counter(skipped=len(rows) - len(todo))
+    if totals["skipped"]:
+        logger.info(f"Resuming import: {totals['skipped']} row(s) already done, {len(todo)} to go")
+
+    async for result in import_links(client, todo, concurrency):
+        report.write(json.dumps(result) + "\n")
+        report.flush()
+        totals[result["status"]] += 1
+        completed = sum(totals.values()) - totals["skipped"]
+        if completed % 500 == 0:
+            logger.info(f"Import progress: {completed}/{len(todo)} row(s)")
+    return totals
+
+
+async def export_links(client: AsyncOverseerrClient) -> List[Dict]:
+    """
+    List every Overseerr user linked to a Discord account.
+
+    Brings the Discord ID index up to date first (a full scan the first time).
+
+    Args:
+        client: Started Overseerr client.
+
+    Returns:
+        One dictionary per linked user, with EXPORT_FIELDS keys, sorted by user ID.
+
+    Raises:
+        aiohttp.ClientError: If the user list cannot be fetched.
+        OverseerrUnavailableError: If Overseerr is unavailable.
+    """
+    await client.refresh_discord_index()
+    rows = []
+    for user_id, discord_id, _checked_at in sorted(client.discord_index.entries()):
+        user = client.directory.get(user_id)
+        if not discord_id or user is None:
+            continue
+        rows.append({
+            "identifier": user.get("plexUsername") or user.get("email") or "",
+            "discordId": discord_id,
+            "userId": user_id,
+            "email": user.get("email") or "",
+            "displayName": user.get("displayName") or "",
+        })
+    return rows
+
+
+def format_export(rows: List[Dict], as_json: bool = False) -> str:
+    """Render exported links as CSV (the import format) or JSON."""
+    if as_json:
+        return json.dumps(rows, indent=2)
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue()
+
+
+def summarize(totals: Counter) -> str:
+    """Describe import totals in one line, e.g. "linked: 120, not_found: 3"."""
+    return ", ".join(f"{status}: {count}" for status, count in sorted(totals.items()) if count) or "nothing to do"
+
+
+async def _main_async(args: argparse.Namespace) -> int:
+    async with AsyncOverseerrClient() as client:
+        if args.command == "export":
+            rows = await export_links(client)
+            with open(args.file, "w", newline="") as f:
+                f.write(format_export(rows, as_json=args.file.lower().endswith(".json")))
+            logger.info(f"Exported {len(rows)} linked user(s) to {args.file}")
+            return 0
+
+        with open(args.file, newline="") as f:
+            rows = parse_link_rows(f.read(), args.file)
+        report_path = args.report or f"{args.file}.report.jsonl"
+        try:
+            with open(report_path) as f:
+                previous = parse_report(f.read())
+        except FileNotFoundError:
+            previous = {}
+
+        with open(report_path, "a") as report:
+            totals = await run_import(client, rows, report, previous, args.concurrency)
+        logger.info(f"Import finished ({summarize(totals)}); report: {report_path}")
+        return 1 if totals["failed"] else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import or export Overseerr Discord links.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="Link accounts from a CSV or JSON file")
+    import_parser.add_argument("file", help='CSV or JSON file of identifier/discordId rows ("unlink" to unlink)')
+    import_parser.add_argument("--report", help="JSON Lines report to write and resume from "
+                                                "(default: <file>.report.jsonl)")
+    import_parser.add_argument("--concurrency", type=int, default=BULK_LINK_CONCURRENCY,
+                               help="Maximum concurrent Overseerr writes")
+    export_parser = subparsers.add_parser("export", help="Write every linked account to a CSV or JSON file")
+    export_parser.add_argument("file", help="Output file (.json for JSON, otherwise CSV)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        raise SystemExit(asyncio.run(_main_async(args)))
+    except BulkLinkError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
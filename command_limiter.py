@@ -0,0 +1,107 @@
+"""
+Per-user command rate limiting for the bot.
+
+Each Discord user gets a token bucket, so someone repeating `!done` or
+`!status` cannot make the bot hammer Overseerr, and may only have one command
+running at a time, so overlapping commands never trigger duplicate upstream
+work. State is only kept for users who were active recently.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple
+
+from discord.ext import commands
+
+
+class CommandRateLimited(commands.CommandError):
+    """
+    The user has run out of command tokens.
+
+    `notify` is True for the first rejection since the user was last allowed
+    a command, so they are told once instead of on every message.
+    """
+
+    def __init__(self, retry_after: float, notify: bool):
+        super().__init__(f"Rate limited, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+        self.notify = notify
+
+
+class CommandInProgress(commands.CommandError):
+    """The user already has a command running."""
+
+    def __init__(self, command: str):
+        super().__init__(f"Still running {command}")
+        self.command = command
+
+
+class _Bucket(NamedTuple):
+    tokens: float
+    updated: float
+    warned: bool
+
+
+class UserCommandLimiter:
+    """
+    Token bucket per Discord user, plus a single in-flight command per user.
+
+    Buckets refill at `rate_per_minute` up to `burst`. They are kept in
+    least-recently-used order, and a bucket idle long enough to have refilled
+    completely is dropped, since it is no different from a new one. Memory is
+    therefore proportional to the number of recently active users. A
+    `rate_per_minute` of 0 disables the rate limit but still allows only one
+    command per user at a time.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60
+        self.burst = max(1, burst)
+        self._buckets: "OrderedDict[int, _Bucket]" = OrderedDict()
+        self._in_flight: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        """Number of users with a bucket or a running command."""
+        return len(self._buckets.keys() | self._in_flight.keys())
+
+    def acquire(self, user_id: int, command: str):
+        """
+        Start a command for a user.
+
+        Args:
+            user_id: Discord ID of the user running the command.
+            command: Name of the command, reported to duplicates.
+
+        Raises:
+            CommandInProgress: If the user already has a command running.
+            CommandRateLimited: If the user has no tokens left.
+        """
+        if user_id in self._in_flight:
+            raise CommandInProgress(self._in_flight[user_id])
+
+        if self.rate > 0:
+            now = time.monotonic()
+            self._evict(now)
+            bucket = self._buckets.pop(user_id, None)
+            if bucket is None:
+                tokens = float(self.burst)
+            else:
+                tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            if tokens < 1:
+                self._buckets[user_id] = _Bucket(tokens, now, True)
+                raise CommandRateLimited((1 - tokens) / self.rate, notify=bucket is None or not bucket.warned)
+            self._buckets[user_id] = _Bucket(tokens - 1, now, False)
+
+        self._in_flight[user_id] = command
+
+    def release(self, user_id: int):
+        """Mark the user's running command as finished."""
+        self._in_flight.pop(user_id, None)
+
+    def _evict(self, now: float):
+        full_after = self.burst / self.rate
+        while self._buckets:
+            user_id, bucket = next(iter(self._buckets.items()))
+            if now - bucket.updated < full_after:
+                break
+            del self._buckets[user_id]
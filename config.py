@@ -4,6 +4,7 @@ Configuration module for Hermes Bot.
 Loads and validates environment variables required for the bot to function.
 """
 
+import ipaddress
 import os
 from dotenv import load_dotenv
 
@@ -19,6 +20,132 @@ BOT_TOKEN = os.getenv("BOT_TOKEN")
 VERIFICATION_EXPIRY_MINUTES = int(os.getenv("VERIFICATION_EXPIRY_MINUTES", "15"))
 ALLOW_GUILD_COMMANDS = os.getenv("ALLOW_GUILD_COMMANDS", "false").lower() in ("true", "1", "yes")
 
+# Slash commands: whether to sync them with Discord at startup, and whether to
+# request the privileged message content intent (needed for prefix commands in
+# guild channels; prefix commands in DMs and slash commands work without it)
+SLASH_COMMANDS_SYNC = os.getenv("SLASH_COMMANDS_SYNC", "true").lower() in ("true", "1", "yes")
+MESSAGE_CONTENT_INTENT = os.getenv("MESSAGE_CONTENT_INTENT", "true").lower() in ("true", "1", "yes")
+
+# Low-footprint mode: request only the intents the link flow needs (DMs, plus
+# guild messages when ALLOW_GUILD_COMMANDS is on), and disable the member cache,
+# guild chunking and the message cache. Resident memory is logged every
+# MEMORY_LOG_MINUTES (0 to only log it at startup)
+LOW_FOOTPRINT_MODE = os.getenv("LOW_FOOTPRINT_MODE", "false").lower() in ("true", "1", "yes")
+MEMORY_LOG_MINUTES = int(os.getenv("MEMORY_LOG_MINUTES", "60"))
+
+# Per-user command rate limit: commands per minute and burst size (0 per minute
+# disables the limit; users can still only run one command at a time)
+USER_COMMANDS_PER_MINUTE = float(os.getenv("USER_COMMANDS_PER_MINUTE", "10"))
+USER_COMMAND_BURST = int(os.getenv("USER_COMMAND_BURST", "3"))
+
+# Discord IDs allowed to run admin commands (bulk link import/export), comma-separated
+BOT_ADMIN_IDS = {int(value) for value in os.getenv("BOT_ADMIN_IDS", "").replace(" ", "").split(",") if value}
+
+# Maximum concurrent Overseerr writes during a bulk link import
+BULK_LINK_CONCURRENCY = int(os.getenv("BULK_LINK_CONCURRENCY", "8"))
+
+# Optional Overseerr webhook receiver, used to complete verifications as soon as
+# Overseerr reports activity for a user with a pending link (listening on
+# anything but loopback requires WEBHOOK_SECRET)
+WEBHOOK_ENABLED = os.getenv("WEBHOOK_ENABLED", "false").lower() in ("true", "1", "yes")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "127.0.0.1")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") or None
+
+# Optional Prometheus-style metrics endpoint (served at /metrics)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("true", "1", "yes")
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
+# Pending link storage: "memory", or "sqlite" to keep verifications across restarts
+PENDING_STORE = os.getenv("PENDING_STORE", "memory").lower()
+PENDING_STORE_PATH = os.getenv("PENDING_STORE_PATH", "hermes.db")
+
+# Sharding: SHARD_COUNT of "auto" (Discord's recommended count) or a number runs
+# the bot sharded; SHARD_IDS (comma-separated) limits this process to some of
+# the shards, so several processes can split them
+SHARD_COUNT = os.getenv("SHARD_COUNT", "").strip().lower()
+SHARD_IDS = [int(value) for value in os.getenv("SHARD_IDS", "").replace(" ", "").split(",") if value]
+# Process-wide duties (the webhook receiver, syncing the slash command tree) only
+# run in the process with shard 0, so several processes don't repeat them
+PRIMARY_PROCESS = not SHARD_IDS or 0 in SHARD_IDS
+
+# State shared between bot processes: "none", or "sqlite" so one process syncs
+# the user directory with Overseerr and the others load it from the database
+SHARED_STATE = os.getenv("SHARED_STATE", "none").lower()
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH", "hermes.db")
+
+# Overseerr HTTP connection pool: total connections, connections per host, and
+# how long idle keep-alive connections are held open
+OVERSEERR_POOL_SIZE = int(os.getenv("OVERSEERR_POOL_SIZE", "20"))
+OVERSEERR_POOL_PER_HOST = int(os.getenv("OVERSEERR_POOL_PER_HOST", "10"))
+OVERSEERR_KEEPALIVE_SECONDS = int(os.getenv("OVERSEERR_KEEPALIVE_SECONDS", "30"))
+
+# Overseerr request resilience: client-side rate limit (requests/second, 0 for
+# no limit; halved on HTTP 429), retries for failed GETs, and the circuit
+# breaker that fails fast after repeated failures
+OVERSEERR_RATE_LIMIT = float(os.getenv("OVERSEERR_RATE_LIMIT", "50"))
+OVERSEERR_RATE_BURST = int(os.getenv("OVERSEERR_RATE_BURST", "20"))
+OVERSEERR_RETRY_ATTEMPTS = int(os.getenv("OVERSEERR_RETRY_ATTEMPTS", "3"))
+OVERSEERR_RETRY_BASE_DELAY = float(os.getenv("OVERSEERR_RETRY_BASE_DELAY", "0.5"))
+OVERSEERR_RETRY_MAX_DELAY = float(os.getenv("OVERSEERR_RETRY_MAX_DELAY", "5"))
+OVERSEERR_BREAKER_THRESHOLD = int(os.getenv("OVERSEERR_BREAKER_THRESHOLD", "5"))
+OVERSEERR_BREAKER_RESET_SECONDS = float(os.getenv("OVERSEERR_BREAKER_RESET_SECONDS", "30"))
+
+# Executor mode: send Overseerr requests with the synchronous requests-based
+# client on a dedicated thread pool instead of aiohttp. Pool size, how many more
+# requests may wait for a thread, and how long a request may take in total
+OVERSEERR_EXECUTOR_MODE = os.getenv("OVERSEERR_EXECUTOR_MODE", "false").lower() in ("true", "1", "yes")
+OVERSEERR_EXECUTOR_WORKERS = int(os.getenv("OVERSEERR_EXECUTOR_WORKERS", "8"))
+OVERSEERR_EXECUTOR_QUEUE = int(os.getenv("OVERSEERR_EXECUTOR_QUEUE", "100"))
+OVERSEERR_EXECUTOR_DEADLINE_SECONDS = float(os.getenv("OVERSEERR_EXECUTOR_DEADLINE_SECONDS", "30"))
+
+# Overseerr /user pagination: users per page, and how many pages to fetch at once
+OVERSEERR_PAGE_SIZE = int(os.getenv("OVERSEERR_PAGE_SIZE", "100"))
+OVERSEERR_PAGE_CONCURRENCY = int(os.getenv("OVERSEERR_PAGE_CONCURRENCY", "4"))
+
+# Maximum concurrent per-user notification settings requests
+NOTIFICATION_FETCH_CONCURRENCY = int(os.getenv("NOTIFICATION_FETCH_CONCURRENCY", "8"))
+
+# How long the cached Overseerr user list is used before it is revalidated
+USER_DIRECTORY_TTL_SECONDS = int(os.getenv("USER_DIRECTORY_TTL_SECONDS", "120"))
+
+# How often the background sync revalidates the user directory and re-checks
+# changed users (keep below USER_DIRECTORY_TTL_SECONDS so commands never wait
+# for a refresh)
+DIRECTORY_SYNC_SECONDS = int(os.getenv("DIRECTORY_SYNC_SECONDS", "60"))
+
+# Whether background syncs only fetch users updated since the last sync, and
+# how often a full sync runs anyway (delta syncs do not notice deleted users)
+DIRECTORY_DELTA_SYNC = os.getenv("DIRECTORY_DELTA_SYNC", "true").lower() in ("true", "1", "yes")
+DIRECTORY_FULL_SYNC_MINUTES = int(os.getenv("DIRECTORY_FULL_SYNC_MINUTES", "30"))
+
+# Optional snapshot of the user directory and Discord ID index, loaded at startup
+# so restarts only revalidate what changed (empty to disable), and how often it
+# is rewritten while the bot runs
+DIRECTORY_SNAPSHOT_PATH = os.getenv("DIRECTORY_SNAPSHOT_PATH", "")
+DIRECTORY_SNAPSHOT_MINUTES = int(os.getenv("DIRECTORY_SNAPSHOT_MINUTES", "10"))
+
+# Single-user lookups (used by !done): cache size, cache lifetime and request timeout
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "256"))
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_FETCH_TIMEOUT_SECONDS = float(os.getenv("USER_FETCH_TIMEOUT_SECONDS", "5"))
+
+# Negative cache for lookups that found nothing (unknown identifiers, unlinked
+# Discord IDs): how many misses to remember, and for how long
+NEGATIVE_CACHE_SIZE = int(os.getenv("NEGATIVE_CACHE_SIZE", "1024"))
+NEGATIVE_CACHE_TTL_SECONDS = int(os.getenv("NEGATIVE_CACHE_TTL_SECONDS", "60"))
+
+# Per-user notification settings cache lifetime, and whether to re-read the
+# settings before each write so concurrent edits are never overwritten
+NOTIFICATION_CACHE_TTL_SECONDS = int(os.getenv("NOTIFICATION_CACHE_TTL_SECONDS", "300"))
+NOTIFICATION_UPDATE_CAS = os.getenv("NOTIFICATION_UPDATE_CAS", "true").lower() in ("true", "1", "yes")
+
+# Discord ID index refresh: how often to refresh, and how many already-indexed
+# users to re-check per refresh (catches links changed directly in Overseerr)
+DISCORD_INDEX_REFRESH_MINUTES = int(os.getenv("DISCORD_INDEX_REFRESH_MINUTES", "10"))
+DISCORD_INDEX_RECHECK_BATCH = int(os.getenv("DISCORD_INDEX_RECHECK_BATCH", "50"))
+
 # Validate required variables
 if not OVERSEERR_API_KEY:
     raise ValueError("OVERSEERR_API_KEY environment variable is required")
@@ -28,3 +155,23 @@ if not BOT_TOKEN:
 
 if not OVERSEERR_BASE_URL:
     raise ValueError("OVERSEERR_BASE_URL environment variable is required")
+
+
+def _is_loopback(host: str) -> bool:
+    """Check whether `host` names a loopback address."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+if WEBHOOK_ENABLED and not WEBHOOK_SECRET and not _is_loopback(WEBHOOK_HOST):
+    raise ValueError("WEBHOOK_SECRET is required when WEBHOOK_HOST is not a loopback address")
+
+if SHARD_COUNT and SHARD_COUNT != "auto" and not SHARD_COUNT.isdigit():
+    raise ValueError("SHARD_COUNT must be a number or 'auto'")
+
+if SHARD_IDS and not SHARD_COUNT.isdigit():
+    raise ValueError("SHARD_IDS requires SHARD_COUNT to be set to the total number of shards")
@@ -0,0 +1,322 @@
+"""
+Local stand-in for the Overseerr API, for benchmarks and manual testing.
+
+Serves synthetic users from the endpoints Hermes uses:
+
+- GET  /api/v1/user                                 (take/skip/sort pagination, ETags)
+- GET  /api/v1/user/{id}
+- GET  /api/v1/user/{id}/settings/notifications
+- POST /api/v1/user/{id}/settings/notifications
+- POST /api/v1/user/{id}/settings/main              (change displayName)
+
+plus GET /_fake/stats and POST /_fake/reset for per-endpoint request counts.
+Every response can be delayed by a fixed latency, and a fraction of requests
+can be failed with 429/503 to exercise error handling.
+
+Like Overseerr's webhook notification agent, it can POST notifications in
+the default webhook template to a URL (such as Hermes' webhook receiver):
+call send_webhook(), or POST /_fake/webhook/{id} to send one about a user.
+
+Usage:
+    python fake_overseerr.py --users 10000 --latency-ms 20 --port 5055
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+API_PREFIX = "/api/v1"
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+class FakeOverseerr:
+    """
+    In-memory Overseerr with N synthetic users.
+
+    Users are named user{id} (plexUsername), user{id}@example.com (email)
+    and "User {id}" (displayName). A `linked_fraction` of them start with a
+    Discord ID of 100000000000000000 + id.
+    """
+
+    def __init__(self, users: int = 1000, latency: float = 0.0, linked_fraction: float = 0.1,
+                 error_rate: float = 0.0, seed: int = 0, api_key: Optional[str] = None,
+                 webhook_url: Optional[str] = None, webhook_auth: Optional[str] = None):
+        self.latency = latency
+        self.webhook_url = webhook_url
+        self.webhook_auth = webhook_auth
+        self.error_rate = error_rate
+        self.api_key = api_key
+        self._random = random.Random(seed)
+        self.stats: Counter = Counter()
+        self.users: Dict[int, Dict] = {}
+        self.notifications: Dict[int, Dict] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self.port: Optional[int] = None
+
+        created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        for user_id in range(1, users + 1):
+            moment = _timestamp(created + timedelta(minutes=user_id))
+            self.users[user_id] = {
+                "id": user_id,
+                "email": f"user{user_id}@example.com",
+                "plexUsername": f"user{user_id}",
+                "username": None,
+                "displayName": f"User {user_id}",
+                "userType": 1,
+                "permissions": 32,
+                "avatar": f"https://plex.tv/users/{user_id}/avatar",
+                "requestCount": self._random.randint(0, 50),
+                "createdAt": moment,
+                "updatedAt": moment,
+            }
+            linked = self._random.random() < linked_fraction
+            self.notifications[user_id] = {
+                "emailEnabled": True,
+                "pgpKey": None,
+                "discordEnabled": linked,
+                "discordEnabledTypes": 12 if linked else 0,
+                "discordId": str(100000000000000000 + user_id) if linked else None,
+                "pushbulletAccessToken": None,
+                "pushoverApplicationToken": None,
+                "pushoverUserKey": None,
+                "pushoverSound": None,
+                "telegramEnabled": False,
+                "telegramBotUsername": None,
+                "telegramChatId": None,
+                "telegramSendSilently": False,
+                "webPushEnabled": True,
+                "notificationTypes": {"discord": 12 if linked else 0, "email": 4, "webpush": 4},
+            }
+
+    def linked_discord_ids(self) -> List[str]:
+        """Return every Discord ID currently linked to a user."""
+        return [n["discordId"] for n in self.notifications.values() if n.get("discordId")]
+
+    def touch(self, user_id: int):
+        """Mark a user as updated now."""
+        self.users[user_id]["updatedAt"] = _timestamp(datetime.now(timezone.utc))
+
+    def set_display_name(self, user_id: int, display_name: str):
+        """Change a user's display name, as the user would in Overseerr's settings."""
+        self.users[user_id]["displayName"] = display_name
+        self.touch(user_id)
+
+    def make_app(self) -> web.Application:
+        """Build the aiohttp application."""
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get(f"{API_PREFIX}/user", self._list_users)
+        app.router.add_get(f"{API_PREFIX}/user/{{id:\\d+}}", self._get_user)
+        app.router.add_get(f"{API_PREFIX}/user/{{id:\\d+}}/settings/notifications", self._get_notifications)
+        app.router.add_post(f"{API_PREFIX}/user/{{id:\\d+}}/settings/notifications", self._post_notifications)
+        app.router.add_post(f"{API_PREFIX}/user/{{id:\\d+}}/settings/main", self._post_main)
+        app.router.add_get("/_fake/stats", self._get_stats)
+        app.router.add_post("/_fake/reset", self._reset_stats)
+        app.router.add_post("/_fake/webhook/{id:\\d+}", self._trigger_webhook)
+        return app
+
+    def webhook_payload(self, user_id: int, notification_type: str = "MEDIA_PENDING") -> Dict:
+        """Build a notification about a user's request in Overseerr's default webhook template."""
+        user = self.users[user_id]
+        return {
+            "notification_type": notification_type,
+            "event": "New Movie Request",
+            "subject": "Example Movie (2024)",
+            "message": "A new request is pending approval.",
+            "image": "",
+            "media": {"media_type": "movie", "tmdbId": "1", "tvdbId": "", "status": "PENDING",
+                      "status4k": "UNKNOWN"},
+            "request": {
+                "request_id": str(user_id),
+                # Overseerr fills requestedBy_username with the display name
+                "requestedBy_email": user["email"],
+                "requestedBy_username": user["displayName"],
+                "requestedBy_avatar": user["avatar"],
+                "requestedBy_settings_discordId": self.notifications[user_id].get("discordId") or "",
+                "requestedBy_settings_telegramChatId": "",
+            },
+            "issue": None,
+            "comment": None,
+            "extra": [],
+        }
+
+    async def send_webhook(self, user_id: int, notification_type: str = "MEDIA_PENDING") -> int:
+        """
+        POST a notification about a user to webhook_url, as Overseerr's webhook agent does.
+
+        Returns:
+            The HTTP status the receiver answered with.
+        """
+        if not self.webhook_url:
+            raise RuntimeError("FakeOverseerr has no webhook_url")
+        headers = {"Authorization": self.webhook_auth} if self.webhook_auth else {}
+        async with aiohttp.ClientSession() as session:
+            async with session.post(self.webhook_url, json=self.webhook_payload(user_id, notification_type),
+                                    headers=headers) as response:
+                self.stats["webhooks_sent"] += 1
+                return response.status
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """
+        Start serving.
+
+        Args:
+            host: Address to listen on.
+            port: Port to listen on (0 picks a free port).
+
+        Returns:
+            The port the server is listening on.
+        """
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self):
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def base_url(self, host: str = "127.0.0.1") -> str:
+        """Return the API base URL to use as OVERSEERR_BASE_URL."""
+        return f"http://{host}:{self.port}{API_PREFIX}"
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        if request.path.startswith("/_fake/"):
+            return await handler(request)
+
+        endpoint = re.sub(r"/\d+(?=/|$)", "/{id}", request.path)
+        self.stats[f"{request.method} {endpoint}"] += 1
+        self.stats["total"] += 1
+
+        if self.api_key and request.headers.get("X-Api-Key") != self.api_key:
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self._random.random() < self.error_rate:
+            if self._random.random() < 0.5:
+                return web.json_response({"message": "Too Many Requests"}, status=429, headers={"Retry-After": "1"})
+            return web.json_response({"message": "Service Unavailable"}, status=503)
+        return await handler(request)
+
+    def _user_or_404(self, request: web.Request) -> Dict:
+        user = self.users.get(int(request.match_info["id"]))
+        if user is None:
+            raise web.HTTPNotFound(text=json.dumps({"message": "User not found."}), content_type="application/json")
+        return user
+
+    @staticmethod
+    def _json_with_etag(request: web.Request, body: Dict) -> web.Response:
+        text = json.dumps(body)
+        etag = 'W/"%s"' % hashlib.sha1(text.encode()).hexdigest()
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(text=text, content_type="application/json", headers={"ETag": etag})
+
+    async def _list_users(self, request: web.Request) -> web.Response:
+        take = int(request.query.get("take", 10))
+        skip = int(request.query.get("skip", 0))
+        users = list(self.users.values())
+        sort = request.query.get("sort")
+        if sort == "updated":
+            users.sort(key=lambda u: u["updatedAt"], reverse=True)
+        elif sort == "displayname":
+            users.sort(key=lambda u: u["displayName"].lower())
+        elif sort == "requests":
+            users.sort(key=lambda u: u["requestCount"], reverse=True)
+        elif sort == "created":
+            users.sort(key=lambda u: u["createdAt"], reverse=True)
+
+        body = {
+            "pageInfo": {
+                "pages": -(-len(users) // take) if take else 1,
+                "pageSize": take,
+                "results": len(users),
+                "page": skip // take + 1 if take else 1,
+            },
+            "results": users[skip:skip + take],
+        }
+        return self._json_with_etag(request, body)
+
+    async def _get_user(self, request: web.Request) -> web.Response:
+        user = self._user_or_404(request)
+        body = dict(user)
+        body["settings"] = {"notifications": self.notifications[user["id"]]}
+        return self._json_with_etag(request, body)
+
+    async def _get_notifications(self, request: web.Request) -> web.Response:
+        user = self._user_or_404(request)
+        return web.json_response(self.notifications[user["id"]])
+
+    async def _post_notifications(self, request: web.Request) -> web.Response:
+        user = self._user_or_404(request)
+        settings = self.notifications[user["id"]]
+        # Overseerr replaces each field it is sent
+        settings.update(await request.json())
+        return web.json_response(settings)
+
+    async def _post_main(self, request: web.Request) -> web.Response:
+        user = self._user_or_404(request)
+        body = await request.json()
+        if "displayName" in body:
+            self.set_display_name(user["id"], body["displayName"])
+        return web.json_response(user)
+
+    async def _get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.stats))
+
+    async def _reset_stats(self, request: web.Request) -> web.Response:
+        self.stats.clear()
+        return web.Response(status=204)
+
+    async def _trigger_webhook(self, request: web.Request) -> web.Response:
+        user = self._user_or_404(request)
+        status = await self.send_webhook(user["id"], request.query.get("type", "MEDIA_PENDING"))
+        return web.json_response({"status": status})
+
+
+async def _serve(args: argparse.Namespace):
+    fake = FakeOverseerr(users=args.users, latency=args.latency_ms / 1000, linked_fraction=args.linked,
+                         error_rate=args.error_rate, seed=args.seed, api_key=args.api_key,
+                         webhook_url=args.webhook_url, webhook_auth=args.webhook_auth)
+    await fake.start(args.host, args.port)
+    print(f"Fake Overseerr with {args.users} users at {fake.base_url(args.host)}")
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Overseerr API server.")
+    parser.add_argument("--users", type=int, default=1000, help="Number of synthetic users")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay added to every response")
+    parser.add_argument("--linked", type=float, default=0.1, help="Fraction of users with a Discord ID")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests failed with 429/503")
+    parser.add_argument("--api-key", default=None, help="Require this X-Api-Key")
+    parser.add_argument("--webhook-url", default=None,
+                        help="Send webhooks here (e.g. http://127.0.0.1:8080/webhook) on POST /_fake/webhook/{id}")
+    parser.add_argument("--webhook-auth", default=None, help="Authorization header to send with webhooks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Prometheus-style metrics for Hermes.
+
+A small, dependency-free registry of counters, gauges and histograms that
+renders the Prometheus text exposition format, plus an optional HTTP server
+exposing it at /metrics. The metrics the bot records are defined at the
+bottom of this module.
+"""
+
+import asyncio
+import functools
+import logging
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+# Latency buckets in seconds, from a fast cache hit up to a multi-minute scan
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    """
+    Base class for a named metric with optional labels.
+
+    Values can be recorded directly or, via set_function(), read from a
+    callback whenever the metrics are rendered.
+    """
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, float] = {}
+        self._callbacks: Dict[LabelValues, Callable[[], float]] = {}
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set_function(self, func: Callable[[], float], **labels):
+        """Read this metric's value from `func` each time metrics are rendered."""
+        self._callbacks[self._key(labels)] = func
+
+    def samples(self) -> Iterator[Tuple[str, LabelValues, float]]:
+        with self._lock:
+            values = dict(self._values)
+        for key, func in self._callbacks.items():
+            try:
+                values[key] = func()
+            except Exception:
+                logger.exception(f"Metric callback for {self.name} failed")
+        for key, value in values.items():
+            yield self.name, key, value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for name, key, value in self.samples():
+            lines.append(f"{name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that can go up and down."""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, with a running sum and count."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._observations: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._observations.setdefault(key, ([0] * len(self.buckets), [0.0]))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the enclosed block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            observations = {key: (list(counts), total[0]) for key, (counts, total) in self._observations.items()}
+        for key, (counts, total) in observations.items():
+            for bound, count in zip(self.buckets, counts):
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {counts[-1]}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def normalize_endpoint(path: str) -> str:
+    """Collapse numeric path segments (user IDs) so endpoints can be used as labels."""
+    return re.sub(r"/\d+(?=/|$)", "/{id}", path)
+
+
+# Upstream request count for the command running in the current task, if any
+_upstream_requests: ContextVar[Optional[List[int]]] = ContextVar("upstream_requests", default=None)
+
+
+def record_upstream_request():
+    """Count one Overseerr request against the command currently running."""
+    counter = _upstream_requests.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def start_command_scope() -> List[int]:
+    """
+    Start counting Overseerr requests made by the current command.
+
+    Must be called from the task that runs the command; tasks it spawns
+    inherit the scope.
+
+    Returns:
+        A one-element list holding the running request count.
+    """
+    counter = [0]
+    _upstream_requests.set(counter)
+    return counter
+
+
+def timed(function_name: str):
+    """Decorator recording the duration of a sync or async Overseerr API function."""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with OVERSEERR_CALL_DURATION.time(function=function_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with OVERSEERR_CALL_DURATION.time(function=function_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def resident_memory_bytes() -> Optional[int]:
+    """
+    Return the process's current resident set size.
+
+    Reads /proc/self/status on Linux; elsewhere falls back to the peak RSS
+    reported by getrusage().
+
+    Returns:
+        Resident memory in bytes, or None if it cannot be determined.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MetricsServer:
+    """aiohttp server exposing the registry at /metrics on the bot's event loop."""
+
+    def __init__(self, host: str, port: int, registry: Registry = REGISTRY):
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self._runner = None
+
+    async def start(self):
+        """Start serving /metrics."""
+        from aiohttp import web
+
+        async def handle(request):
+            return web.Response(text=self.registry.render(), content_type="text/plain", charset="utf-8")
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Metrics available at http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        """Stop serving /metrics."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+# Metrics recorded by the bot
+
+COMMAND_DURATION = REGISTRY.register(Histogram(
+    "hermes_command_duration_seconds", "End-to-end latency of bot commands.", ("command", "status")))
+COMMAND_UPSTREAM_REQUESTS = REGISTRY.register(Histogram(
+    "hermes_command_upstream_requests", "Overseerr HTTP requests made per bot command.", ("command",),
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100, 250, 1000, 5000)))
+OVERSEERR_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "hermes_overseerr_request_duration_seconds", "Latency of Overseerr HTTP requests.", ("method", "endpoint")))
+OVERSEERR_RESPONSES = REGISTRY.register(Counter(
+    "hermes_overseerr_responses_total", "Overseerr HTTP responses by status code.", ("method", "endpoint", "status")))
+OVERSEERR_RETRIES = REGISTRY.register(Counter(
+    "hermes_overseerr_retries_total", "Retried Overseerr HTTP requests.", ("method", "endpoint")))
+OVERSEERR_CIRCUIT_OPEN = REGISTRY.register(Gauge(
+    "hermes_overseerr_circuit_open", "1 while the Overseerr circuit breaker is refusing requests."))
+OVERSEERR_RATE_LIMIT = REGISTRY.register(Gauge(
+    "hermes_overseerr_rate_limit", "Current client-side Overseerr request rate limit (requests/second, 0 = none)."))
+OVERSEERR_CALL_DURATION = REGISTRY.register(Histogram(
+    "hermes_overseerr_call_duration_seconds", "Latency of Overseerr API functions, including retries and caching.",
+    ("function",)))
+PENDING_LINKS = REGISTRY.register(Gauge(
+    "hermes_pending_links", "Verifications waiting for !done."))
+CACHE_HITS = REGISTRY.register(Counter(
+    "hermes_cache_hits_total", "Lookups served from a cache.", ("cache",)))
+CACHE_MISSES = REGISTRY.register(Counter(
+    "hermes_cache_misses_total", "Lookups that had to go to Overseerr.", ("cache",)))
+EXECUTOR_QUEUE_WAIT = REGISTRY.register(Histogram(
+    "hermes_executor_queue_wait_seconds", "Time Overseerr requests waited for an executor thread."))
+EXECUTOR_QUEUED = REGISTRY.register(Gauge(
+    "hermes_executor_queued", "Overseerr requests waiting for an executor thread."))
+EXECUTOR_BUSY_WORKERS = REGISTRY.register(Gauge(
+    "hermes_executor_busy_workers", "Executor threads currently running an Overseerr request."))
+EXECUTOR_WORKERS = REGISTRY.register(Gauge(
+    "hermes_executor_workers", "Size of the Overseerr executor thread pool."))
+EXECUTOR_REJECTED = REGISTRY.register(Counter(
+    "hermes_executor_rejected_total", "Overseerr requests refused or abandoned by the executor.", ("reason",)))
+COMMANDS_REJECTED = REGISTRY.register(Counter(
+    "hermes_commands_rejected_total", "Commands refused by the per-user limits.", ("reason",)))
+RESIDENT_MEMORY = REGISTRY.register(Gauge(
+    "hermes_process_resident_memory_bytes", "Resident memory of the bot process."))
+RESIDENT_MEMORY.set_function(lambda: resident_memory_bytes() or 0)
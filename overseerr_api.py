@@ -6,14 +6,191 @@ and notification settings.
 """
 
 import logging
-from typing import Optional, List, Dict
+import time
+from typing import Optional, List, Dict, Iterator
+from urllib.parse import urlparse
 import requests
-
-from config import OVERSEERR_API_KEY, OVERSEERR_BASE_URL
+from requests.adapters import HTTPAdapter
+
+import metrics
+from config import (
+    OVERSEERR_API_KEY, OVERSEERR_BASE_URL, OVERSEERR_PAGE_SIZE, OVERSEERR_POOL_SIZE, OVERSEERR_POOL_PER_HOST,
+    USER_FETCH_TIMEOUT_SECONDS, OVERSEERR_RATE_LIMIT, OVERSEERR_RATE_BURST, OVERSEERR_RETRY_ATTEMPTS,
+    OVERSEERR_RETRY_BASE_DELAY, OVERSEERR_RETRY_MAX_DELAY, OVERSEERR_BREAKER_THRESHOLD,
+    OVERSEERR_BREAKER_RESET_SECONDS,
+)
+from resilience import (
+    RETRYABLE_STATUSES, CircuitBreaker, OverseerrUnavailableError, RetryPolicy, TokenBucket, parse_retry_after,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def _create_session() -> requests.Session:
+    """Create the keep-alive session shared by every call in this module."""
+    session = requests.Session()
+    session.headers["X-Api-Key"] = OVERSEERR_API_KEY
+    adapter = HTTPAdapter(pool_connections=OVERSEERR_POOL_SIZE, pool_maxsize=OVERSEERR_POOL_PER_HOST)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.hooks["response"].append(_record_response)
+    return session
+
+
+def _record_response(response: requests.Response, *args, **kwargs):
+    """Session response hook recording request metrics."""
+    endpoint = metrics.normalize_endpoint(urlparse(response.url).path)
+    method = response.request.method
+    metrics.record_upstream_request()
+    metrics.OVERSEERR_REQUEST_DURATION.observe(response.elapsed.total_seconds(), method=method, endpoint=endpoint)
+    metrics.OVERSEERR_RESPONSES.inc(method=method, endpoint=endpoint, status=str(response.status_code))
+
+
+_session = _create_session()
+
+# Rate limiter, circuit breaker and retry policy, shared with AsyncOverseerrClient
+# so every request to Overseerr counts against the same budget
+rate_limiter = TokenBucket(OVERSEERR_RATE_LIMIT, OVERSEERR_RATE_BURST)
+circuit_breaker = CircuitBreaker(OVERSEERR_BREAKER_THRESHOLD, OVERSEERR_BREAKER_RESET_SECONDS)
+retry_policy = RetryPolicy(OVERSEERR_RETRY_ATTEMPTS, OVERSEERR_RETRY_BASE_DELAY, OVERSEERR_RETRY_MAX_DELAY)
+metrics.OVERSEERR_CIRCUIT_OPEN.set_function(lambda: int(circuit_breaker.state == CircuitBreaker.OPEN))
+metrics.OVERSEERR_RATE_LIMIT.set_function(lambda: rate_limiter.rate)
+
+
+def _request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Send a request through the shared rate limiter, circuit breaker and retry policy.
+
+    GET requests that time out, cannot connect, or get a 429 or 5xx response
+    are retried with jittered backoff. Other requests are sent once.
+
+    Args:
+        method: HTTP method.
+        url: Full request URL.
+        **kwargs: Passed to requests.Session.request().
+
+    Returns:
+        The response. Client errors such as 404 are returned for the caller to handle.
+
+    Raises:
+        OverseerrUnavailableError: If Overseerr is unreachable, overloaded or failing.
+    """
+    endpoint = metrics.normalize_endpoint(urlparse(url).path)
+    attempts = retry_policy.attempts if method == "GET" else 1
+
+    for attempt in range(attempts):
+        if not circuit_breaker.allow():
+            raise OverseerrUnavailableError("Overseerr is failing, not sending requests for now",
+                                            retry_after=circuit_breaker.retry_after())
+        delay = rate_limiter.reserve(max_wait=retry_policy.max_delay)
+        if delay > retry_policy.max_delay:
+            raise OverseerrUnavailableError("Overseerr is rate limiting requests", retry_after=delay)
+        if delay:
+            time.sleep(delay)
+
+        retry_after = None
+        try:
+            response = _session.request(method, url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            circuit_breaker.record_failure()
+            error = f"{method} {endpoint} failed: {type(e).__name__}: {e}"
+        else:
+            if response.status_code == 429:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                rate_limiter.throttled(retry_after)
+                error = f"{method} {endpoint} was rate limited (HTTP 429)"
+            elif response.status_code in RETRYABLE_STATUSES:
+                circuit_breaker.record_failure()
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                error = f"{method} {endpoint} failed with HTTP {response.status_code}"
+            else:
+                circuit_breaker.record_success()
+                rate_limiter.succeeded()
+                return response
+
+        wait = retry_policy.delay(attempt, retry_after) if attempt + 1 < attempts else None
+        if wait is None:
+            raise OverseerrUnavailableError(error, retry_after=retry_after)
+        logger.warning(f"{error}; retrying in {wait:.1f}s")
+        metrics.OVERSEERR_RETRIES.inc(method=method, endpoint=endpoint)
+        time.sleep(wait)
+
+
+def pool_stats() -> Dict:
+    """
+    Report connection pool usage for the shared session.
+
+    Returns:
+        Dictionary with the configured limits and, per host, the number of
+        connections opened, requests sent and idle connections available.
+    """
+    hosts = {}
+    for adapter in set(_session.adapters.values()):
+        for key in adapter.poolmanager.pools.keys():
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+                # The pool queue is pre-filled with None placeholders for unopened slots
+                "idle": sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0,
+            }
+    return {"pool_size": OVERSEERR_POOL_SIZE, "per_host_limit": OVERSEERR_POOL_PER_HOST, "hosts": hosts}
+
+
+@metrics.timed("get_user_page")
+def get_user_page(skip: int, take: int = OVERSEERR_PAGE_SIZE) -> Dict:
+    """
+    Fetch one page of users from Overseerr.
+
+    Args:
+        skip: Number of users to skip.
+        take: Maximum number of users to return.
+
+    Returns:
+        Response dictionary with "pageInfo" and "results" keys.
+
+    Raises:
+        requests.exceptions.RequestException: If the API request fails.
+        OverseerrUnavailableError: If Overseerr is unavailable.
+    """
+    params = {"take": take, "skip": skip}
+    response = _request("GET", f"{OVERSEERR_BASE_URL}/user", params=params, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+
+def iter_users(page_size: int = OVERSEERR_PAGE_SIZE) -> Iterator[Dict]:
+    """
+    Iterate over every Overseerr user, fetching one page at a time.
+
+    Pages are only requested as the caller consumes them, so stopping early
+    avoids downloading the rest of the user list.
+
+    Args:
+        page_size: Number of users to request per page.
+
+    Yields:
+        User dictionaries from Overseerr API.
+
+    Raises:
+        requests.exceptions.RequestException: If an API request fails.
+        OverseerrUnavailableError: If Overseerr is unavailable.
+    """
+    skip = 0
+    while True:
+        data = get_user_page(skip, page_size)
+        results = data.get("results", [])
+        yield from results
+
+        pages = (data.get("pageInfo") or {}).get("pages", 1)
+        skip += page_size
+        if not results or skip >= pages * page_size:
+            return
+
+
+@metrics.timed("get_users")
 def get_users() -> List[Dict]:
     """
     Fetch all users from Overseerr.
@@ -23,15 +200,53 @@ def get_users() -> List[Dict]:
 
     Raises:
         requests.exceptions.RequestException: If the API request fails.
+        OverseerrUnavailableError: If Overseerr is unavailable.
     """
-    headers = {"X-Api-Key": OVERSEERR_API_KEY}
-    response = requests.get(f"{OVERSEERR_BASE_URL}/user", headers=headers, timeout=10)
-    response.raise_for_status()
+    return list(iter_users())
+
 
-    data = response.json()
-    return data.get("results", [])
+@metrics.timed("get_user")
+def get_user(user_id: int) -> Optional[Dict]:
+    """
+    Fetch a single Overseerr user.
 
+    Args:
+        user_id: The Overseerr user ID.
 
+    Returns:
+        User dictionary if found, None otherwise.
+
+    Raises:
+        OverseerrUnavailableError: If Overseerr is unavailable.
+    """
+    try:
+        response = _request("GET", f"{OVERSEERR_BASE_URL}/user/{user_id}", timeout=USER_FETCH_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Failed to fetch user {user_id} from Overseerr: {e}")
+        return None
+
+
+def user_matches(user: Dict, identifier_lower: str) -> bool:
+    """
+    Check whether a user matches a lowercased identifier.
+
+    Args:
+        user: User dictionary from the Overseerr API.
+        identifier_lower: Lowercased Plex username, email, or display name.
+
+    Returns:
+        True if any of the identifying fields match, False otherwise.
+    """
+    # Check plexUsername, email and displayName
+    for field in ("plexUsername", "email", "displayName"):
+        if (user.get(field) or "").lower() == identifier_lower:
+            return True
+    return False
+
+
+@metrics.timed("find_user")
 def find_user(identifier: str) -> Optional[Dict]:
     """
     Find an Overseerr user by identifier.
@@ -48,31 +263,54 @@ def find_user(identifier: str) -> Optional[Dict]:
 
     Returns:
         User dictionary if found, None otherwise.
+
+    Raises:
+        OverseerrUnavailableError: If Overseerr is unavailable, so callers can
+            tell a transient failure apart from an unknown identifier.
     """
+    identifier_lower = identifier.lower()
+
     try:
-        users = get_users()
+        for user in iter_users():
+            if user_matches(user, identifier_lower):
+                return user
     except requests.exceptions.RequestException as e:
         logger.error(f"Failed to fetch users from Overseerr: {e}")
-        return None
 
-    identifier_lower = identifier.lower()
+    return None
 
-    for user in users:
-        # Check plexUsername
-        if user.get("plexUsername", "").lower() == identifier_lower:
-            return user
 
-        # Check email
-        if user.get("email", "").lower() == identifier_lower:
-            return user
+def merge_notification_settings(user_data: Dict) -> Optional[Dict]:
+    """
+    Extract notification settings from a full /user/{id} response.
 
-        # Check displayName
-        if user.get("displayName", "").lower() == identifier_lower:
-            return user
+    Some Overseerr versions may have flattened notification keys at the top level,
+    so both locations are merged to handle different API versions.
 
-    return None
+    Args:
+        user_data: User dictionary returned by /user/{id}.
+
+    Returns:
+        Notification settings dictionary, or None if the user has none.
+    """
+    settings = user_data.get("settings") or {}
+    notifications = settings.get("notifications") or {}
+
+    merged = {}
+
+    # Check for top-level notification keys
+    for key in ["discordId", "discordEnabled", "discordEnabledTypes", "notificationTypes", "emailEnabled"]:
+        if key in user_data and user_data[key] is not None:
+            merged[key] = user_data[key]
+
+    # Layer in nested notification settings (takes priority)
+    for key, value in notifications.items():
+        merged[key] = value
 
+    return merged if merged else None
 
+
+@metrics.timed("get_user_notifications")
 def get_user_notifications(user_id: int) -> Optional[Dict]:
     """
     Fetch notification settings for a specific Overseerr user.
@@ -85,13 +323,14 @@ def get_user_notifications(user_id: int) -> Optional[Dict]:
 
     Returns:
         Notification settings dictionary if found, None otherwise.
-    """
-    headers = {"X-Api-Key": OVERSEERR_API_KEY}
 
+    Raises:
+        OverseerrUnavailableError: If Overseerr is unavailable.
+    """
     # Try the notifications endpoint first
     try:
         url = f"{OVERSEERR_BASE_URL}/user/{user_id}/settings/notifications"
-        response = requests.get(url, headers=headers, timeout=10)
+        response = _request("GET", url, timeout=10)
 
         if response.status_code == 200:
             return response.json()
@@ -101,33 +340,16 @@ def get_user_notifications(user_id: int) -> Optional[Dict]:
     # Fallback: try getting full user data and extract notifications
     try:
         url = f"{OVERSEERR_BASE_URL}/user/{user_id}"
-        response = requests.get(url, headers=headers, timeout=10)
+        response = _request("GET", url, timeout=10)
         response.raise_for_status()
 
-        user_data = response.json()
-        settings = user_data.get("settings") or {}
-        notifications = settings.get("notifications") or {}
-
-        # Some Overseerr versions may have flattened notification keys at the top level
-        # Merge both to handle different API versions
-        merged = {}
-
-        # Check for top-level notification keys
-        for key in ["discordId", "discordEnabled", "discordEnabledTypes", "notificationTypes", "emailEnabled"]:
-            if key in user_data and user_data[key] is not None:
-                merged[key] = user_data[key]
-
-        # Layer in nested notification settings (takes priority)
-        for key, value in notifications.items():
-            merged[key] = value
-
-        return merged if merged else None
-
+        return merge_notification_settings(response.json())
     except requests.exceptions.RequestException as e:
         logger.error(f"Failed to fetch user data for user {user_id}: {e}")
         return None
 
 
+@metrics.timed("find_user_by_discord_id")
 def find_user_by_discord_id(discord_id: str) -> Optional[Dict]:
     """
     Find an Overseerr user by their linked Discord ID.
@@ -140,58 +362,69 @@ def find_user_by_discord_id(discord_id: str) -> Optional[Dict]:
 
     Returns:
         User dictionary with _notificationSettings key if found, None otherwise.
+
+    Raises:
+        OverseerrUnavailableError: If Overseerr is unavailable.
     """
     try:
-        users = get_users()
+        for user in iter_users():
+            user_id = user.get("id")
+            if user_id is None:
+                continue
+
+            # Fetch notification settings for this user
+            notif = get_user_notifications(user_id)
+            if not notif:
+                continue
+
+            # Compare as strings to handle type mismatches
+            if str(notif.get("discordId")) == str(discord_id):
+                # Return merged user data with notification settings
+                merged = dict(user)
+                merged["_notificationSettings"] = notif
+                return merged
     except requests.exceptions.RequestException as e:
         logger.error(f"Failed to fetch users from Overseerr: {e}")
-        return None
-
-    for user in users:
-        user_id = user.get("id")
-        if user_id is None:
-            continue
-
-        # Fetch notification settings for this user
-        notif = get_user_notifications(user_id)
-        if not notif:
-            continue
-
-        # Compare as strings to handle type mismatches
-        if str(notif.get("discordId")) == str(discord_id):
-            # Return merged user data with notification settings
-            merged = dict(user)
-            merged["_notificationSettings"] = notif
-            return merged
 
     return None
 
 
-def update_user_notifications(user_id: int, discord_id: Optional[str], enable: bool) -> bool:
+def build_notification_payload(discord_id: Optional[str], enable: bool, current: Optional[Dict] = None) -> Dict:
     """
-    Update a user's Discord notification settings in Overseerr.
+    Build the notification settings payload for linking or unlinking Discord.
+
+    Overseerr's settings endpoint replaces every notification setting it is
+    sent, so when the user's current settings are known they are copied and
+    only the Discord fields are changed. This leaves the user's email,
+    Pushbullet, Pushover, Telegram and web push settings untouched.
 
     Args:
-        user_id: The Overseerr user ID.
         discord_id: The Discord user ID (snowflake), or None to unlink.
         enable: True to enable Discord notifications, False to disable.
+        current: The user's current notification settings, if known.
 
     Returns:
-        True if successful, False otherwise.
-
-    Raises:
-        requests.exceptions.RequestException: If the API request fails.
+        Payload dictionary for POST /user/{id}/settings/notifications.
     """
-    headers = {
-        "X-Api-Key": OVERSEERR_API_KEY,
-        "Content-Type": "application/json"
-    }
-
     # discordEnabledTypes bitmask:
     # 0 = none, 4 = Request Approved, 8 = Request Available, 12 = both
+    discord_types = 12 if enable else 0
+
+    if current is not None:
+        payload = dict(current)
+        notification_types = dict(current.get("notificationTypes") or {})
+        notification_types["discord"] = discord_types
+        payload.update({
+            "notificationTypes": notification_types,
+            "discordEnabled": enable,
+            "discordEnabledTypes": discord_types,
+            "discordId": discord_id,
+        })
+        return payload
+
     payload = {
         "notificationTypes": {
-            "discord": 12 if enable else 0,  # Enable both Request Approved (4) and Request Available (8)
+            "discord": discord_types,  # Enable both Request Approved (4) and Request Available (8)
             "email": 0,
             "pushbullet": 0,
             "pushover": 0,
@@ -203,7 +436,7 @@ def update_user_notifications(user_id: int, discord_id: Optional[str], enable: b
         "emailEnabled": False,
         "pgpKey": None,
         "discordEnabled": enable,
-        "discordEnabledTypes": 12 if enable else 0,
+        "discordEnabledTypes": discord_types,
         "discordId": discord_id,
         "pushbulletAccessToken": None,
         "pushoverApplicationToken": None,
@@ -214,14 +447,71 @@ def update_user_notifications(user_id: int, discord_id: Optional[str], enable: b
         "telegramChatId": None,
         "telegramSendSilently": False
     }
+    return payload
+
+
+def discord_settings_match(settings: Dict, discord_id: Optional[str], enable: bool) -> bool:
+    """
+    Check whether notification settings already have the requested Discord state.
+
+    Args:
+        settings: A user's notification settings.
+        discord_id: The Discord user ID (snowflake), or None for unlinked.
+        enable: Whether Discord notifications should be enabled.
+
+    Returns:
+        True if writing the Discord settings would change nothing.
+    """
+    discord_types = 12 if enable else 0
+    return (
+        (settings.get("discordId") or None) == discord_id
+        and bool(settings.get("discordEnabled")) == enable
+        and settings.get("discordEnabledTypes") == discord_types
+        and (settings.get("notificationTypes") or {}).get("discord") == discord_types
+    )
+
+
+@metrics.timed("update_user_notifications")
+def update_user_notifications(user_id: int, discord_id: Optional[str], enable: bool) -> bool:
+    """
+    Update a user's Discord notification settings in Overseerr.
+
+    The user's current settings are read first so only the Discord fields
+    change; if they already match, nothing is written.
+
+    Args:
+        user_id: The Overseerr user ID.
+        discord_id: The Discord user ID (snowflake), or None to unlink.
+        enable: True to enable Discord notifications, False to disable.
+
+    Returns:
+        True if successful, False otherwise.
+    """
+    try:
+        current = get_user_notifications(user_id)
+    except OverseerrUnavailableError as e:
+        logger.error(f"Failed to read notifications for user {user_id}: {e}")
+        return False
+
+    if current is None:
+        logger.warning(f"Could not read notification settings for user {user_id}; sending defaults")
+    elif discord_settings_match(current, discord_id, enable):
+        logger.info(
+            f"Notifications for user {user_id} already up to date (Discord ID: {discord_id}, enabled: {enable})"
+        )
+        return True
+
+    payload = build_notification_payload(discord_id, enable, current)
 
     url = f"{OVERSEERR_BASE_URL}/user/{user_id}/settings/notifications"
 
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=10)
+        response = _request("POST", url, json=payload, timeout=10)
         response.raise_for_status()
-        logger.info(f"Successfully updated notifications for user {user_id} (Discord ID: {discord_id}, enabled: {enable})")
+        logger.info(
+            f"Successfully updated notifications for user {user_id} (Discord ID: {discord_id}, enabled: {enable})"
+        )
         return True
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, OverseerrUnavailableError) as e:
         logger.error(f"Failed to update notifications for user {user_id}: {e}")
         return False
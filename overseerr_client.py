@@ -0,0 +1,911 @@
+"""
+Asynchronous Overseerr API client.
+
+Provides an aiohttp-based client with async equivalents of the functions in
+overseerr_api, so command handlers never block the Discord event loop while
+waiting on Overseerr.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import aclosing
+from itertools import islice
+from urllib.parse import urlparse
+from typing import Optional, List, Dict, Any, AsyncIterator, Deque, Tuple, Iterable, Set
+
+import aiohttp
+
+from config import (
+    OVERSEERR_API_KEY, OVERSEERR_BASE_URL, OVERSEERR_PAGE_SIZE, OVERSEERR_PAGE_CONCURRENCY,
+    OVERSEERR_POOL_SIZE, OVERSEERR_POOL_PER_HOST, OVERSEERR_KEEPALIVE_SECONDS, USER_DIRECTORY_TTL_SECONDS,
+    NOTIFICATION_FETCH_CONCURRENCY, USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS, USER_FETCH_TIMEOUT_SECONDS,
+    NOTIFICATION_CACHE_TTL_SECONDS, NOTIFICATION_UPDATE_CAS, NEGATIVE_CACHE_SIZE, NEGATIVE_CACHE_TTL_SECONDS,
+)
+import overseerr_api
+from overseerr_api import build_notification_payload, discord_settings_match, merge_notification_settings
+import metrics
+from resilience import (
+    RETRYABLE_STATUSES, CircuitBreaker, OverseerrUnavailableError, RetryPolicy, TokenBucket, parse_retry_after,
+)
+from singleflight import SingleFlight
+from snapshot import SnapshotError, decode_snapshot, encode_snapshot, load_snapshot, save_snapshot
+from user_directory import DiscordIndex, TTLCache, UserDirectory
+
+logger = logging.getLogger(__name__)
+
+# Errors raised by aiohttp for network failures, bad statuses and timeouts
+REQUEST_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+
+
+class AsyncOverseerrClient:
+    """
+    Async client for the Overseerr API.
+
+    The client owns a single pooled aiohttp session. Call start() once the
+    event loop is running (e.g. from the bot's setup_hook) and close() on
+    shutdown.
+
+    Requests go through a rate limiter, circuit breaker and retry policy,
+    shared by default with overseerr_api. When Overseerr is unreachable or
+    failing, lookups raise OverseerrUnavailableError rather than reporting
+    the user as not found.
+    """
+
+    def __init__(self, base_url: str = OVERSEERR_BASE_URL, api_key: str = OVERSEERR_API_KEY,
+                 timeout: float = 10, page_size: int = OVERSEERR_PAGE_SIZE,
+                 page_concurrency: int = OVERSEERR_PAGE_CONCURRENCY,
+                 directory_ttl: float = USER_DIRECTORY_TTL_SECONDS,
+                 notification_concurrency: int = NOTIFICATION_FETCH_CONCURRENCY,
+                 rate_limiter: Optional[TokenBucket] = None, circuit_breaker: Optional[CircuitBreaker] = None,
+                 retry_policy: Optional[RetryPolicy] = None):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self.page_size = page_size
+        self.page_concurrency = max(1, page_concurrency)
+        self.notification_concurrency = max(1, notification_concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.rate_limiter = rate_limiter or overseerr_api.rate_limiter
+        self.circuit_breaker = circuit_breaker or overseerr_api.circuit_breaker
+        self.retry_policy = retry_policy or overseerr_api.retry_policy
+        self._pool_counters = {"connections_opened": 0, "connections_reused": 0, "in_flight": 0, "requests": 0}
+        self.directory = UserDirectory(ttl=directory_ttl, miss_size=NEGATIVE_CACHE_SIZE,
+                                       miss_ttl=NEGATIVE_CACHE_TTL_SECONDS)
+        self.user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+        self.user_timeout = USER_FETCH_TIMEOUT_SECONDS
+        self.notification_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=NOTIFICATION_CACHE_TTL_SECONDS)
+        # Settings this client wrote recently, trusted without re-reading them
+        self.recent_writes = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+        # Coalesces concurrent identical requests (user list, per-user settings)
+        self._flights = SingleFlight()
+        self.discord_index = DiscordIndex(miss_size=NEGATIVE_CACHE_SIZE, miss_ttl=NEGATIVE_CACHE_TTL_SECONDS)
+        # Users that were new or changed in a directory refresh and have not
+        # had their notification settings re-checked yet
+        self._changed_user_ids: Set[int] = set()
+        for name, cache in (("directory", self.directory), ("user", self.user_cache),
+                            ("notifications", self.notification_cache),
+                            ("unknown_identifiers", self.directory.not_found),
+                            ("unlinked_discord_ids", self.discord_index.unlinked)):
+            metrics.CACHE_HITS.set_function(lambda cache=cache: cache.hits, cache=name)
+            metrics.CACHE_MISSES.set_function(lambda cache=cache: cache.misses, cache=name)
+
+    async def start(self):
+        """Create the shared keep-alive HTTP session."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=OVERSEERR_POOL_SIZE,
+                limit_per_host=OVERSEERR_POOL_PER_HOST,
+                keepalive_timeout=OVERSEERR_KEEPALIVE_SECONDS,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"X-Api-Key": self.api_key},
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=[self._trace_config()],
+            )
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        """Build a trace config recording request metrics and connection reuse for pool_stats()."""
+        counters = self._pool_counters
+
+        async def on_request_start(session, ctx, params):
+            ctx.start = time.perf_counter()
+            counters["requests"] += 1
+            counters["in_flight"] += 1
+            metrics.record_upstream_request()
+
+        async def on_request_end(session, ctx, params):
+            counters["in_flight"] -= 1
+            self._record_request(ctx, params, str(params.response.status))
+
+        async def on_request_exception(session, ctx, params):
+            counters["in_flight"] -= 1
+            self._record_request(ctx, params, "error")
+
+        async def on_connection_create_end(session, ctx, params):
+            counters["connections_opened"] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            counters["connections_reused"] += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    @staticmethod
+    def _record_request(ctx, params, status: str):
+        endpoint = metrics.normalize_endpoint(params.url.path)
+        metrics.OVERSEERR_REQUEST_DURATION.observe(
+            time.perf_counter() - ctx.start, method=params.method, endpoint=endpoint)
+        metrics.OVERSEERR_RESPONSES.inc(method=params.method, endpoint=endpoint, status=status)
+
+    def pool_stats(self) -> Dict:
+        """
+        Report connection pool usage.
+
+        Returns:
+            Dictionary with the configured limits, requests currently in
+            flight, and how many connections were opened versus reused.
+        """
+        return {
+            "pool_size": OVERSEERR_POOL_SIZE,
+            "per_host_limit": OVERSEERR_POOL_PER_HOST,
+            **self._pool_counters,
+        }
+
+    async def close(self):
+        """Close the shared HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            raise RuntimeError("AsyncOverseerrClient.start() must be called before making requests")
+        return self._session
+
+    async def _request(self, method: str, path: str, **kwargs) -> Tuple[int, Any, Optional[str]]:
+        """
+        Send a request through the rate limiter, circuit breaker and retry policy.
+
+        GET requests that time out, cannot connect, or get a 429 or 5xx
+        response are retried with jittered backoff. Other requests are sent once.
+
+        Args:
+            method: HTTP method.
+            path: Path relative to the base URL.
+            **kwargs: Passed to aiohttp.ClientSession.request().
+
+        Returns:
+            Tuple of (status, decoded JSON body or None for 204/304, ETag).
+
+        Raises:
+            aiohttp.ClientResponseError: For other error statuses, such as 404.
+            OverseerrUnavailableError: If Overseerr is unreachable, overloaded or failing.
+        """
+        url = f"{self.base_url}{path}"
+        endpoint = metrics.normalize_endpoint(urlparse(url).path)
+        attempts = self.retry_policy.attempts if method == "GET" else 1
+
+        for attempt in range(attempts):
+            if not self.circuit_breaker.allow():
+                raise OverseerrUnavailableError("Overseerr is failing, not sending requests for now",
+                                                retry_after=self.circuit_breaker.retry_after())
+            delay = self.rate_limiter.reserve(max_wait=self.retry_policy.max_delay)
+            if delay > self.retry_policy.max_delay:
+                raise OverseerrUnavailableError("Overseerr is rate limiting requests", retry_after=delay)
+            if delay:
+                await asyncio.sleep(delay)
+
+            retry_after = None
+            try:
+                async with self.session.request(method, url, **kwargs) as response:
+                    if response.status == 429:
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                        self.rate_limiter.throttled(retry_after)
+                        error = f"{method} {endpoint} was rate limited (HTTP 429)"
+                    elif response.status in RETRYABLE_STATUSES:
+                        self.circuit_breaker.record_failure()
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                        error = f"{method} {endpoint} failed with HTTP {response.status}"
+                    else:
+                        self.circuit_breaker.record_success()
+                        self.rate_limiter.succeeded()
+                        response.raise_for_status()
+                        body = None if response.status in (204, 304) else await response.json(content_type=None)
+                        return response.status, body, response.headers.get("ETag")
+            except aiohttp.ClientResponseError:
+                raise
+            except REQUEST_ERRORS as e:
+                self.circuit_breaker.record_failure()
+                error = f"{method} {endpoint} failed: {type(e).__name__}: {e}"
+
+            wait = self.retry_policy.delay(attempt, retry_after) if attempt + 1 < attempts else None
+            if wait is None:
+                raise OverseerrUnavailableError(error, retry_after=retry_after)
+            logger.warning(f"{error}; retrying in {wait:.1f}s")
+            metrics.OVERSEERR_RETRIES.inc(method=method, endpoint=endpoint)
+            await asyncio.sleep(wait)
+
+    async def _get_json(self, path: str, **kwargs) -> Any:
+        """GET a path relative to the base URL and return the decoded JSON body."""
+        _, body, _ = await self._request("GET", path, **kwargs)
+        return body
+
+    async def _get_user_page(self, skip: int, take: int,
+                             etag: Optional[str] = None) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Fetch one page of users, revalidating against a cached ETag if given.
+
+        Returns:
+            Tuple of (response dictionary, or None if the page is unchanged; ETag).
+        """
+        headers = {"If-None-Match": etag} if etag else None
+        params = {"take": take, "skip": skip}
+        status, body, new_etag = await self._request("GET", "/user", params=params, headers=headers)
+        if status == 304:
+            return None, etag
+        return body, new_etag
+
+    async def get_user_page(self, skip: int, take: Optional[int] = None) -> Dict:
+        """
+        Fetch one page of users from Overseerr.
+
+        Args:
+            skip: Number of users to skip.
+            take: Maximum number of users to return (defaults to the page size).
+
+        Returns:
+            Response dictionary with "pageInfo" and "results" keys.
+
+        Raises:
+            aiohttp.ClientError: If the API request fails.
+            OverseerrUnavailableError: If Overseerr is unavailable.
+        """
+        data, _ = await self._get_user_page(skip, take or self.page_size)
+        return data
+
+    async def _iter_user_pages(self, page_size: int, etags: Optional[Dict[int, str]] = None,
+                               cached: Optional[Dict[int, Dict]] = None
+                               ) -> AsyncIterator[Tuple[int, Dict, Optional[str]]]:
+        """
+        Iterate over /user pages, yielding (skip, response, ETag) in order.
+
+        The first page reports the total page count; the remaining pages are
+        then fetched concurrently (up to page_concurrency at a time). When
+        `etags` and `cached` are given, pages are revalidated with
+        If-None-Match and unchanged pages are served from `cached`.
+        """
+        etags = etags or {}
+        cached = cached or {}
+
+        async def fetch(skip: int) -> Tuple[int, Dict, Optional[str]]:
+            etag = etags.get(skip) if skip in cached else None
+            data, new_etag = await self._get_user_page(skip, page_size, etag)
+            return skip, (cached[skip] if data is None else data), new_etag
+
+        first = await fetch(0)
+        yield first
+
+        pages = (first[1].get("pageInfo") or {}).get("pages", 1)
+        next_page = 1
+        pending: Deque[asyncio.Task] = deque()
+        try:
+            while next_page < pages or pending:
+                while next_page < pages and len(pending) < self.page_concurrency:
+                    pending.append(asyncio.ensure_future(fetch(next_page * page_size)))
+                    next_page += 1
+
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    # Mark the result as retrieved so failures aren't logged as unhandled
+                    task.exception()
+
+    async def iter_users(self, page_size: Optional[int] = None) -> AsyncIterator[Dict]:
+        """
+        Iterate over every Overseerr user, page by page.
+
+        Pages after the first are fetched concurrently and yielded in order.
+        Closing the iterator early cancels any pages still in flight, so use
+        contextlib.aclosing() when breaking out of the loop.
+
+        Args:
+            page_size: Number of users to request per page.
+
+        Yields:
+            User dictionaries from Overseerr API.
+
+        Raises:
+            aiohttp.ClientError: If an API request fails.
+            OverseerrUnavailableError: If Overseerr is unavailable.
+        """
+        async with aclosing(self._iter_user_pages(page_size or self.page_size)) as pages:
+            async for _, data, _ in pages:
+                for user in data.get("results", []):
+                    yield user
+
+    @metrics.timed("get_users")
+    async def get_users(self) -> List[Dict]:
+        """
+        Fetch all users from Overseerr.
+
+        Concurrent callers share a single download.
+
+        Returns:
+            List of user dictionaries from Overseerr API.
+
+        Raises:
+            aiohttp.ClientError: If the API request fails.
+            OverseerrUnavailableError: If Overseerr is unavailable.
+        """
+        return await self._flights.do("users", self._fetch_users)
+
+    async def _fetch_users(self) -> List[Dict]:
+        return [user async for user in self.iter_users()]
+
+    @metrics.timed("refresh_directory")
+    async def refresh_directory(self, force: bool = False):
+        """
+        Refresh the cached user directory if it is older than its TTL.
+
+        Every page is revalidated with If-None-Match, so pages Overseerr
+        reports as unchanged are reused without downloading them again.
+        Concurrent callers share a single refresh.
+
+        Args:
+            force: Refresh even if the directory is still fresh.
+
+        Raises:
+            aiohttp.ClientError: If the API request fails.
+            OverseerrUnavailableError: If Overseerr is unavailable.
+        """
+        if not force and self.directory.is_fresh():
+            self.directory.hits += 1
+            return
+
+        self.directory.misses += 1
+        await self._flights.do("directory", self._refresh_directory)
+
+    async def _refresh_directory(self):
+        pages: Dict[int, Dict] = {}
+        etags: Dict[int, str] = {}
+        async with aclosing(self._iter_user_pages(self.page_size, self.directory.etags,
+                                                  self.directory.pages)) as page_iter:
+            async for skip, data, etag in page_iter:
+                pages[skip] = data
+                if etag:
+                    etags[skip] = etag
+
+        self.directory.pages = pages
+        self.directory.etags = etags
+        self._changed_user_ids |= self.directory.replace(
+            [user for data in pages.values() for user in data.get("results", [])])
+        logger.debug(f"User directory refreshed: {len(self.directory)} user(s)")
+
+    @metrics.timed("sync_directory_delta")
+    async def sync_directory_delta(self) -> int:
+        """
+        Fetch only the users updated since the directory's high-water mark.
+
+        Pages users sorted by most recently updated and stops at the first
+        user older than the high-water mark, so an unchanged directory costs
+        a single request. Changed users are applied to the directory and
+        queued for a notification settings re-check. Deleted users are not
+        noticed; a full refresh_directory() catches those. Falls back to a
+        full refresh if the directory has not been loaded.
+
+        Returns:
+            Number of new or changed users.
+
+        Raises:
+            aiohttp.ClientError: If the API request fails.
+            OverseerrUnavailableError: If Overseerr is unavailable.
+        """
+        high_water_mark = self.directory.high_water_mark
+        if self.directory.loaded_at is None or high_water_mark is None:
+            await self.refresh_directory(force=True)
+            return len(self._changed_user_ids)
+
+        updated: List[Dict] = []
+        skip = 0
+        while True:
+            page = await self._get_json("/user", params={"take": self.page_size, "skip": skip, "sort": "updated"})
+            results = page.get("results", [])
+            # Users updated at exactly the high-water mark may not all have been seen yet
+            newer = [user for user in results if (user.get("updatedAt") or "") >= high_water_mark]
+            updated.extend(newer)
+            if len(newer) < len(results) or len(results) < self.page_size:
+                break
+            skip += self.page_size
+
+        changed = self.directory.upsert(updated)
+        self._changed_user_ids |= changed
+        self.directory.touch()
+        if changed:
+            logger.debug(f"Delta sync: {len(changed)} user(s) changed since {high_water_mark}")
+        return len(changed)
+
+    @metrics.timed("find_user")
+    async def find_user(self, identifier: str, fresh: bool = False) -> Optional[Dict]:
+        """
+        Find an Overseerr user by Plex username, email or display name.
+
+        Search is case-insensitive and served from the cached user directory,
+        which is refreshed at most once per TTL window. An identifier that
+        recently matched nobody is answered from the negative cache without
+        refreshing.
+
+        Args:
+            identifier: The username, email, or display name to search for.
+            fresh: Revalidate the directory first (e.g. to see a just-saved display name).
+
+        Returns:
+            User dictionary if found, None otherwise.
+
+        Raises:
+            OverseerrUnavailableError: If Overseerr is unavailable and no cached
+                directory can be used instead.
+        """
+        key = identifier.lower()
+        if not fresh and self.directory.not_found.get(key):
+            return None
+
+        try:
+            await self.refresh_directory(force=fresh)
+        except (*REQUEST_ERRORS, OverseerrUnavailableError) as e:
+            if self.directory.loaded_at is None:
+                if isinstance(e, OverseerrUnavailableError):
+                    raise
+                logger.error(f"Failed to fetch users from Overseerr: {e}")
+                return None
+            logger.warning(f"Failed to refresh users from Overseerr, using cached directory: {e}")
+
+        user = self.directory.find(identifier)
+        if user is None:
+            self.directory.not_found.set(key, True)
+        return user
+
+    @metrics.timed("get_user")
+    async def get_user(self, user_id: int, fresh: bool = False) -> Optional[Dict]:
+        """
+        Fetch a single Overseerr user.
+
+        Results are kept in a small per-user cache. The request has its own,
+        shorter timeout than bulk calls, since it backs interactive commands.
+
+        Args:
+            user_id: The Overseerr user ID.
+            fresh: Skip the cache (e.g. to see a just-saved display name).
+
+        Returns:
+            User dictionary if found, None otherwise.
+
+        Raises:
+            OverseerrUnavailableError: If Overseerr is unavailable.
+        """
+        if not fresh:
+            user = self.user_cache.get(user_id)
+            if user is not None:
+                return user
+
+        try:
+            user = await self._flights.do(("user", user_id), lambda: self._get_json(
+                f"/user/{user_id}", timeout=aiohttp.ClientTimeout(total=self.user_timeout)
+            ))
+        except REQUEST_ERRORS as e:
+            logger.error(f"Failed to fetch user {user_id} from Overseerr: {e}")
+            return None
+
+        self.user_cache.set(user_id, user)
+        return user
+
+    @metrics.timed("get_user_notifications")
+    async def get_user_notifications(self, user_id: int, fresh: bool = False) -> Optional[Dict]:
+        """
+        Fetch notification settings for a specific Overseerr user.
+
+        Results are cached per user so a link followed by an unlink (or a
+        repeated link) only reads the settings once. Concurrent callers asking
+        for the same user share a single request.
+
+        Args:
+            user_id: The Overseerr user ID.
+            fresh: Skip the cache and re-read the settings from Overseerr.
+
+        Returns:
+            Notification settings dictionary if found, None otherwise.
+
+        Raises:
+            OverseerrUnavailableError: If Overseerr is unavailable.
+        """
+        if not fresh:
+            notif = self.notification_cache.get(user_id)
+            if notif is not None:
+                return notif
+
+        notif = await self._flights.do(("notifications", user_id), lambda: self._fetch_user_notifications(user_id))
+        if notif is not None:
+            self.notification_cache.set(user_id, notif)
+            self.recent_writes.discard(user_id)
+        return notif
+
+    async def _fetch_user_notifications(self, user_id: int) -> Optional[Dict]:
+        # Try the notifications endpoint first
+        try:
+            return await self._get_json(f"/user/{user_id}/settings/notifications")
+        except REQUEST_ERRORS as e:
+            logger.warning(f"Failed to fetch notifications endpoint for user {user_id}: {e}")
+
+        # Fallback: try getting full user data and extract notifications
+        try:
+            user_data = await self._get_json(f"/user/{user_id}")
+        except REQUEST_ERRORS as e:
+            logger.error(f"Failed to fetch user data for user {user_id}: {e}")
+            return None
+
+        return merge_notification_settings(user_data)
+
+    async def iter_user_notifications(self, user_ids: Iterable[int],
+                                      concurrency: Optional[int] = None
+                                      ) -> AsyncIterator[Tuple[int, Optional[Dict]]]:
+        """
+        Fetch notification settings for many users with bounded concurrency.
+
+        At most `concurrency` requests are in flight at once; results are
+        yielded as they complete, not in input order. Closing the iterator
+        early cancels the outstanding requests, so callers can stop as soon
+        as they find what they are looking for.
+
+        Args:
+            user_ids: The Overseerr user IDs to fetch.
+            concurrency: Maximum requests in flight (defaults to notification_concurrency).
+
+        Yields:
+            Tuples of (user ID, notification settings or None).
+
+        Raises:
+            OverseerrUnavailableError: If Overseerr is unavailable.
+        """
+        concurrency = concurrency or self.notification_concurrency
+        remaining = iter(user_ids)
+        pending: Set[asyncio.Task] = set()
+
+        async def fetch(user_id: int) -> Tuple[int, Optional[Dict]]:
+            return user_id, await self.get_user_notifications(user_id, fresh=True)
+
+        try:
+            while True:
+                for user_id in islice(remaining, concurrency - len(pending)):
+                    pending.add(asyncio.ensure_future(fetch(user_id)))
+                if not pending:
+                    return
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @metrics.timed("find_user_by_discord_id")
+    async def find_user_by_discord_id(self, discord_id: str) -> Optional[Dict]:
+        """
+        Find an Overseerr user by their linked Discord ID.
+
+        Once the Discord ID index has been built this is a dictionary lookup
+        plus a single request confirming the link is still current. Until then
+        the notification settings of users not yet indexed are scanned
+        concurrently, stopping at the first match. A Discord ID found unlinked
+        is remembered for a short while, so asking again costs no requests.
+
+        Args:
+            discord_id: The Discord user ID (snowflake) to search for.
+
+        Returns:
+            User dictionary with _notificationSettings key if found, None otherwise.
+
+        Raises:
+            OverseerrUnavailableError: If Overseerr is unavailable.
+        """
+        discord_id = str(discord_id)
+        if self.discord_index.unlinked.get(discord_id):
+            return None
+
+        user = await self._confirm_discord_link(discord_id)
+        if user is not None or self.discord_index.ready:
+            if user is None:
+                self.discord_index.unlinked.set(discord_id, True)
+            return user
+
+        try:
+            await self.refresh_directory()
+        except REQUEST_ERRORS as e:
+            logger.error(f"Failed to fetch users from Overseerr: {e}")
+            return None
+
+        unchecked = [user_id for user_id in self.directory.user_ids() if user_id not in self.discord_index]
+        async with aclosing(self.iter_user_notifications(unchecked)) as results:
+            async for user_id, notif in results:
+                if not notif:
+                    continue
+                self.discord_index.update(user_id, notif.get("discordId"))
+
+                # Compare as strings to handle type mismatches; closing the
+                # iterator cancels the requests still in flight
+                if str(notif.get("discordId")) == str(discord_id):
+                    merged = dict(self.directory.get(user_id))
+                    merged["_notificationSettings"] = notif
+                    return merged
+
+        self.discord_index.unlinked.set(discord_id, True)
+        return None
+
+    async def _confirm_discord_link(self, discord_id: str) -> Optional[Dict]:
+        """Resolve a Discord ID through the index and confirm it against Overseerr."""
+        user_id = self.discord_index.lookup(discord_id)
+        if user_id is None:
+            return None
+
+        # Our own write a moment ago needs no confirming
+        notif = self.recent_writes.get(user_id) or await self.get_user_notifications(user_id, fresh=True)
+        if not notif:
+            return None
+
+        self.discord_index.update(user_id, notif.get("discordId"))
+        if str(notif.get("discordId")) != str(discord_id):
+            logger.info(f"Discord ID index entry for user {user_id} was stale, removed")
+            return None
+
+        merged = dict(self.directory.get(user_id) or await self.get_user(user_id) or {"id": user_id})
+        merged["_notificationSettings"] = notif
+        return merged
+
+    @metrics.timed("refresh_discord_index")
+    async def refresh_discord_index(self, recheck: int = 0, delta: bool = False) -> int:
+        """
+        Incrementally refresh the Discord ID index.
+
+        Refreshes the user directory (in full, or with a delta sync of just
+        the recently updated users), drops users that no longer exist, and fetches
+        notification settings for users that have never been checked, users
+        whose updatedAt changed since the last refresh, and the `recheck`
+        users with the oldest checks. The first call builds the whole index.
+
+        Args:
+            recheck: Number of already-indexed users to re-check.
+            delta: Only fetch users updated since the last sync.
+
+        Returns:
+            Number of users whose notification settings were fetched.
+
+        Raises:
+            aiohttp.ClientError: If the user list cannot be fetched.
+            OverseerrUnavailableError: If Overseerr is unavailable.
+        """
+        if delta and self.directory.loaded_at is not None:
+            # New users are among the changed ones, and deletions are left to full refreshes
+            await self.sync_directory_delta()
+            new_ids = []
+            changed, self._changed_user_ids = self._changed_user_ids, set()
+        else:
+            await self.refresh_directory(force=True)
+            user_ids = self.directory.user_ids()
+            for user_id in self.discord_index.user_ids() - user_ids:
+                self.discord_index.remove_user(user_id)
+            new_ids = [user_id for user_id in user_ids if user_id not in self.discord_index]
+            changed, self._changed_user_ids = self._changed_user_ids & user_ids, set()
+        to_check = list(dict.fromkeys(new_ids + sorted(changed) + self.discord_index.stalest(recheck)))
+
+        try:
+            async for user_id, notif in self.iter_user_notifications(to_check):
+                # Leave failed users unchecked so the next refresh retries them
+                if notif is not None:
+                    self.discord_index.update(user_id, notif.get("discordId"))
+                    changed.discard(user_id)
+        finally:
+            self._changed_user_ids |= changed
+
+        self.discord_index.ready = True
+        return len(to_check)
+
+    async def save_snapshot(self, path: str):
+        """
+        Write the user directory and Discord ID index to a snapshot file.
+
+        The state is captured on the event loop and serialised in a worker
+        thread, so a large directory does not stall the bot.
+
+        Args:
+            path: Snapshot file to write.
+
+        Raises:
+            OSError: If the file cannot be written.
+        """
+        pages = dict(self.directory.pages)
+        etags = dict(self.directory.etags)
+        entries = self.discord_index.entries()
+        await asyncio.to_thread(save_snapshot, path, pages, etags, entries, self.discord_index.ready)
+        logger.debug(f"Saved directory snapshot to {path}: {len(self.directory)} user(s), {len(entries)} checked")
+
+    async def load_snapshot(self, path: str) -> bool:
+        """
+        Restore the user directory and Discord ID index from a snapshot file.
+
+        Restored users are served immediately. The next refresh revalidates
+        every page with its saved ETag, and only users that were added or
+        changed since the snapshot have their notification settings fetched.
+
+        Args:
+            path: Snapshot file to read.
+
+        Returns:
+            True if a snapshot was loaded, False if there was none or it was unusable.
+        """
+        try:
+            snapshot = await asyncio.to_thread(load_snapshot, path)
+        except SnapshotError as e:
+            logger.warning(f"Not using directory snapshot: {e}")
+            return False
+
+        self._restore_snapshot(snapshot)
+        age_minutes = (time.time() - snapshot["created_at"]) / 60
+        logger.info(
+            f"Loaded directory snapshot from {path}: {len(self.directory)} user(s), "
+            f"{len(self.discord_index)} linked, {age_minutes:.0f} minute(s) old"
+        )
+        return True
+
+    async def export_state(self) -> bytes:
+        """
+        Encode the user directory and Discord ID index for other bot processes.
+
+        Returns:
+            The state in snapshot format, for load_shared_state().
+        """
+        pages = dict(self.directory.pages)
+        etags = dict(self.directory.etags)
+        entries = self.discord_index.entries()
+        return await asyncio.to_thread(encode_snapshot, pages, etags, entries, self.discord_index.ready)
+
+    async def load_shared_state(self, data: bytes) -> bool:
+        """
+        Load a user directory and Discord ID index published by another process.
+
+        Unlike a snapshot file, the published directory is treated as current
+        (from the time it was published), so lookups use it without refreshing.
+        Index entries this process checked more recently are kept.
+
+        Args:
+            data: State returned by export_state().
+
+        Returns:
+            True if the state was loaded, False if it was unusable.
+        """
+        try:
+            snapshot = await asyncio.to_thread(decode_snapshot, data, "shared directory")
+        except SnapshotError as e:
+            logger.warning(f"Not using shared directory: {e}")
+            return False
+
+        self._restore_snapshot(snapshot, age=time.time() - snapshot["created_at"])
+        logger.debug(f"Loaded shared directory: {len(self.directory)} user(s), {len(self.discord_index)} linked")
+        return True
+
+    def _restore_snapshot(self, snapshot: Dict, age: Optional[float] = None):
+        self.directory.restore(snapshot["pages"], snapshot["etags"], age=age)
+        for user_id in self.discord_index.user_ids() - self.directory.user_ids():
+            self.discord_index.remove_user(user_id)
+        self.discord_index.restore(snapshot["index"])
+        self.discord_index.ready = snapshot["index_ready"]
+
+    @metrics.timed("update_user_notifications")
+    async def update_user_notifications(self, user_id: int, discord_id: Optional[str], enable: bool,
+                                        compare_and_swap: Optional[bool] = None) -> bool:
+        """
+        Update a user's Discord notification settings in Overseerr.
+
+        The write is merged into the user's current settings so only the
+        Discord fields change, and skipped entirely if they already have the
+        requested values.
+
+        On success the settings cache and Discord ID index are updated from
+        the payload that was sent, so reads straight after the write need no
+        request. Only if Overseerr's response does not match the payload are
+        the user's settings re-read.
+
+        With compare-and-swap enabled (the default), the settings are re-read
+        before writing so edits made in Overseerr since they were cached are
+        kept, and the conflict is logged. Without it the write is merged into
+        the cached settings, saving a request but risking overwriting such
+        edits.
+
+        Args:
+            user_id: The Overseerr user ID.
+            discord_id: The Discord user ID (snowflake), or None to unlink.
+            enable: True to enable Discord notifications, False to disable.
+            compare_and_swap: Revalidate before writing (defaults to NOTIFICATION_UPDATE_CAS).
+
+        Returns:
+            True if successful, False otherwise.
+        """
+        if compare_and_swap is None:
+            compare_and_swap = NOTIFICATION_UPDATE_CAS
+
+        try:
+            if compare_and_swap:
+                cached = self.notification_cache.get(user_id)
+                current = await self.get_user_notifications(user_id, fresh=True)
+                if cached is not None and current is not None and current != cached:
+                    logger.warning(
+                        f"Notification settings for user {user_id} changed concurrently; merging into latest"
+                    )
+            else:
+                current = await self.get_user_notifications(user_id)
+        except OverseerrUnavailableError as e:
+            logger.error(f"Failed to read notifications for user {user_id}: {e}")
+            return False
+
+        if current is None:
+            logger.warning(f"Could not read notification settings for user {user_id}; sending defaults")
+        elif discord_settings_match(current, discord_id, enable):
+            logger.info(
+                f"Notifications for user {user_id} already up to date (Discord ID: {discord_id}, enabled: {enable})"
+            )
+            self.discord_index.update(user_id, discord_id if enable else None)
+            return True
+
+        payload = build_notification_payload(discord_id, enable, current)
+
+        try:
+            _, saved, _ = await self._request("POST", f"/user/{user_id}/settings/notifications", json=payload)
+        except (*REQUEST_ERRORS, OverseerrUnavailableError) as e:
+            logger.error(f"Failed to update notifications for user {user_id}: {e}")
+            self.notification_cache.discard(user_id)
+            self.recent_writes.discard(user_id)
+            return False
+
+        # The single-user cache holds the old settings too
+        self.user_cache.discard(user_id)
+        if isinstance(saved, dict) and not discord_settings_match(saved, discord_id, enable):
+            logger.warning(f"Overseerr saved different notification settings for user {user_id}; re-reading them")
+            self.recent_writes.discard(user_id)
+            try:
+                latest = await self.get_user_notifications(user_id, fresh=True)
+            except OverseerrUnavailableError as e:
+                logger.error(f"Failed to re-read notifications for user {user_id}: {e}")
+                latest = None
+            if latest is None:
+                self.notification_cache.discard(user_id)
+                return True
+            self.discord_index.update(user_id, latest.get("discordId"))
+            if not discord_settings_match(latest, discord_id, enable):
+                logger.error(
+                    f"Notifications for user {user_id} were not updated (Discord ID: {discord_id}, enabled: {enable})"
+                )
+                return False
+        else:
+            self.notification_cache.set(user_id, payload)
+            self.recent_writes.set(user_id, payload)
+            self.discord_index.update(user_id, discord_id if enable else None)
+        logger.info(
+            f"Successfully updated notifications for user {user_id} (Discord ID: {discord_id}, enabled: {enable})"
+        )
+        return True
@@ -0,0 +1,196 @@
+"""
+Executor mode for Overseerr requests.
+
+Runs Overseerr HTTP requests through the synchronous overseerr_api module on
+a dedicated, bounded thread pool, keeping them off the event loop thread.
+It is an alternative transport for AsyncOverseerrClient for deployments that
+prefer the requests-based stack: the directory, caches and Discord ID index
+all work exactly as they do with aiohttp.
+
+The pool has a fixed number of workers and a limit on queued requests, and
+every request has a deadline. A request that cannot be queued, or is still
+waiting when its deadline passes or its command is cancelled, fails with
+OverseerrUnavailableError without ever being sent.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import aiohttp
+import requests
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+import metrics
+import overseerr_api
+from config import OVERSEERR_EXECUTOR_DEADLINE_SECONDS, OVERSEERR_EXECUTOR_QUEUE, OVERSEERR_EXECUTOR_WORKERS
+from overseerr_client import AsyncOverseerrClient
+from resilience import OverseerrUnavailableError
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a queue-depth limit, deadlines and queue-time metrics.
+
+    At most `workers` calls run at once and at most `max_queue` more wait
+    for a worker; further calls are refused straight away.
+    """
+
+    def __init__(self, workers: int, max_queue: int, thread_name_prefix: str = "overseerr"):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=thread_name_prefix)
+        self._lock = threading.Lock()
+        # Calls submitted and not yet finished, and how many of them are running
+        self.pending = 0
+        self.running = 0
+        metrics.EXECUTOR_QUEUED.set_function(lambda: self.queued)
+        metrics.EXECUTOR_BUSY_WORKERS.set_function(lambda: self.running)
+        metrics.EXECUTOR_WORKERS.set_function(lambda: self.workers)
+
+    async def run(self, func: Callable[..., Any], *args, deadline: Optional[float] = None) -> Any:
+        """
+        Run `func(*args)` on the pool and wait for its result.
+
+        The call runs in a copy of the caller's context, so per-command
+        metrics still count its requests.
+
+        Args:
+            func: Blocking function to call.
+            *args: Arguments for `func`.
+            deadline: Seconds the caller is prepared to wait, including queueing.
+
+        Returns:
+            Whatever `func` returned.
+
+        Raises:
+            OverseerrUnavailableError: If the queue is full, or the deadline
+                passed before the call finished.
+            Whatever exception `func` raised.
+        """
+        with self._lock:
+            if self.pending >= self.workers + self.max_queue:
+                metrics.EXECUTOR_REJECTED.inc(reason="queue_full")
+                raise OverseerrUnavailableError("Too many Overseerr requests are waiting; try again shortly")
+            self.pending += 1
+
+        submitted = time.monotonic()
+        expires_at = None if deadline is None else submitted + deadline
+        abandoned = threading.Event()
+        context = contextvars.copy_context()
+
+        def call():
+            with self._lock:
+                self.running += 1
+            try:
+                metrics.EXECUTOR_QUEUE_WAIT.observe(time.monotonic() - submitted)
+                # Skip work nobody is waiting for any more
+                if abandoned.is_set() or (expires_at is not None and time.monotonic() >= expires_at):
+                    metrics.EXECUTOR_REJECTED.inc(reason="expired")
+                    raise OverseerrUnavailableError("Overseerr request expired while queued")
+                return context.run(func, *args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.pending -= 1
+
+        future = asyncio.get_running_loop().run_in_executor(self._pool, call)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=deadline)
+        except asyncio.TimeoutError:
+            metrics.EXECUTOR_REJECTED.inc(reason="deadline")
+            raise OverseerrUnavailableError(f"Overseerr request did not finish within {deadline:.0f}s")
+        finally:
+            if not future.done():
+                abandoned.set()
+                # Nobody will read the result; retrieve any exception so it is not logged
+                future.add_done_callback(lambda done: done.cancelled() or done.exception())
+
+    @property
+    def queued(self) -> int:
+        """Calls waiting for a worker."""
+        return self.pending - self.running
+
+    def stats(self) -> Dict:
+        """Report pool size and current usage."""
+        return {"workers": self.workers, "busy": self.running, "queued": self.queued, "max_queue": self.max_queue}
+
+    def shutdown(self):
+        """Stop the pool once the calls already submitted have finished."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _as_client_error(method: str, url: str, status: int, reason: str) -> aiohttp.ClientResponseError:
+    """Build the aiohttp error AsyncOverseerrClient's callers expect for an error status."""
+    request_info = aiohttp.RequestInfo(URL(url), method, CIMultiDictProxy(CIMultiDict()), URL(url))
+    return aiohttp.ClientResponseError(request_info, (), status=status, message=reason)
+
+
+class ExecutorOverseerrClient(AsyncOverseerrClient):
+    """
+    AsyncOverseerrClient that sends requests with overseerr_api on a bounded thread pool.
+
+    Requests share overseerr_api's keep-alive session, rate limiter, circuit
+    breaker and retry policy; retries and backoff sleep on the worker thread.
+    """
+
+    def __init__(self, *args, workers: int = OVERSEERR_EXECUTOR_WORKERS, max_queue: int = OVERSEERR_EXECUTOR_QUEUE,
+                 deadline: float = OVERSEERR_EXECUTOR_DEADLINE_SECONDS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.deadline = deadline
+        self.executor = BoundedExecutor(workers, max_queue)
+
+    async def start(self):
+        """Nothing to open: the requests session is created on import of overseerr_api."""
+
+    async def close(self):
+        """Stop the thread pool."""
+        self.executor.shutdown()
+
+    def pool_stats(self) -> Dict:
+        return {**overseerr_api.pool_stats(), "executor": self.executor.stats()}
+
+    async def _request(self, method: str, path: str, **kwargs) -> Tuple[int, Any, Optional[str]]:
+        """
+        Send a request on the thread pool.
+
+        Accepts the same arguments as AsyncOverseerrClient._request(); an
+        aiohttp.ClientTimeout is converted to a requests timeout, and the
+        call's deadline is the longer of that timeout and the executor
+        deadline.
+
+        Returns:
+            Tuple of (status, decoded JSON body or None for 204/304, ETag).
+
+        Raises:
+            aiohttp.ClientResponseError: For other error statuses, such as 404.
+            aiohttp.ClientError: If the request fails in another way.
+            OverseerrUnavailableError: If Overseerr is unavailable, the queue
+                is full, or the deadline passed.
+        """
+        url = f"{self.base_url}{path}"
+        timeout = kwargs.pop("timeout", None)
+        kwargs["timeout"] = timeout.total if isinstance(timeout, aiohttp.ClientTimeout) else (timeout or self.timeout)
+        return await self.executor.run(self._send, method, url, kwargs,
+                                       deadline=max(self.deadline, kwargs["timeout"]))
+
+    @staticmethod
+    def _send(method: str, url: str, kwargs: Dict) -> Tuple[int, Any, Optional[str]]:
+        try:
+            response = overseerr_api._request(method, url, **kwargs)
+            if response.status_code >= 400:
+                raise _as_client_error(method, url, response.status_code, response.reason)
+            body = None if response.status_code in (204, 304) or not response.content else response.json()
+        except json.JSONDecodeError as e:
+            raise aiohttp.ClientPayloadError(f"Invalid JSON from {method} {url}: {e}")
+        except requests.RequestException as e:
+            raise aiohttp.ClientError(f"{method} {url} failed: {type(e).__name__}: {e}")
+        return response.status_code, body, response.headers.get("ETag")
@@ -0,0 +1,305 @@
+"""
+Storage for pending link verifications.
+
+A pending link records which Overseerr account a Discord user is trying to
+link and the verification code they were given. Stores behave like a dict
+keyed by Discord ID and keep entries ordered by expiry, so expired entries
+can be removed without scanning every pending link.
+
+Code running on the event loop should use the async methods (aget(),
+aset(), apop() and so on): the SQLite store runs those on a worker thread,
+so a database locked by another process never stalls the bot.
+"""
+
+import asyncio
+import heapq
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Structure of a pending link entry:
+# {"identifier": str, "code": str, "ts": float, "user_id": int}
+PendingLink = Dict
+
+
+class PendingLinkStore:
+    """
+    Base class for pending link stores.
+
+    Subclasses implement the dict-style accessors plus pop_expired() and
+    next_expiry(). An entry expires `expiry_seconds` after its "ts".
+    """
+
+    def __init__(self, expiry_seconds: float):
+        self.expiry_seconds = expiry_seconds
+
+    def __getitem__(self, discord_id: int) -> PendingLink:
+        raise NotImplementedError
+
+    def __setitem__(self, discord_id: int, entry: PendingLink):
+        raise NotImplementedError
+
+    def __delitem__(self, discord_id: int):
+        raise NotImplementedError
+
+    def __contains__(self, discord_id: int) -> bool:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def items(self) -> Iterator[Tuple[int, PendingLink]]:
+        raise NotImplementedError
+
+    def get(self, discord_id: int) -> Optional[PendingLink]:
+        """Return the pending link for a Discord ID, or None."""
+        try:
+            return self[discord_id]
+        except KeyError:
+            return None
+
+    def pop(self, discord_id: int, default=None) -> Optional[PendingLink]:
+        """Remove and return the pending link for a Discord ID, or `default`."""
+        try:
+            entry = self[discord_id]
+            del self[discord_id]
+        except KeyError:
+            return default
+        return entry
+
+    def discord_ids_for_user(self, user_id: int) -> List[int]:
+        """Return the Discord IDs with a pending link to an Overseerr user."""
+        raise NotImplementedError
+
+    def pop_expired(self, now: Optional[float] = None) -> List[int]:
+        """
+        Remove every expired entry.
+
+        Args:
+            now: Current time (defaults to time.time()).
+
+        Returns:
+            Discord IDs whose pending links were removed.
+        """
+        raise NotImplementedError
+
+    def next_expiry(self) -> Optional[float]:
+        """Return the time at which the next entry expires, or None if empty."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the store."""
+
+    async def _run(self, func: Callable[..., Any], *args) -> Any:
+        """Run a store method on behalf of an async caller."""
+        return func(*args)
+
+    async def aget(self, discord_id: int) -> Optional[PendingLink]:
+        """Async get()."""
+        return await self._run(self.get, discord_id)
+
+    async def aset(self, discord_id: int, entry: PendingLink):
+        """Async `store[discord_id] = entry`."""
+        await self._run(self.__setitem__, discord_id, entry)
+
+    async def apop(self, discord_id: int, default=None) -> Optional[PendingLink]:
+        """Async pop()."""
+        return await self._run(self.pop, discord_id, default)
+
+    async def adiscord_ids_for_user(self, user_id: int) -> List[int]:
+        """Async discord_ids_for_user()."""
+        return await self._run(self.discord_ids_for_user, user_id)
+
+    async def apop_expired(self, now: Optional[float] = None) -> List[int]:
+        """Async pop_expired()."""
+        return await self._run(self.pop_expired, now)
+
+    async def anext_expiry(self) -> Optional[float]:
+        """Async next_expiry()."""
+        return await self._run(self.next_expiry)
+
+
+class InMemoryPendingLinkStore(PendingLinkStore):
+    """
+    Pending link store held in process memory.
+
+    Expiry times are kept in a min-heap. Entries that are replaced or deleted
+    leave stale heap items behind, which are skipped when popped.
+    """
+
+    def __init__(self, expiry_seconds: float):
+        super().__init__(expiry_seconds)
+        self._entries: Dict[int, PendingLink] = {}
+        self._expiry_heap: List[Tuple[float, int]] = []
+
+    def __getitem__(self, discord_id: int) -> PendingLink:
+        return self._entries[discord_id]
+
+    def __setitem__(self, discord_id: int, entry: PendingLink):
+        self._entries[discord_id] = entry
+        heapq.heappush(self._expiry_heap, (entry["ts"] + self.expiry_seconds, discord_id))
+
+    def __delitem__(self, discord_id: int):
+        del self._entries[discord_id]
+
+    def __contains__(self, discord_id: int) -> bool:
+        return discord_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def items(self) -> Iterator[Tuple[int, PendingLink]]:
+        return iter(list(self._entries.items()))
+
+    def discord_ids_for_user(self, user_id: int) -> List[int]:
+        return [discord_id for discord_id, entry in self._entries.items() if entry["user_id"] == user_id]
+
+    def _is_current(self, expires_at: float, discord_id: int) -> bool:
+        entry = self._entries.get(discord_id)
+        return entry is not None and entry["ts"] + self.expiry_seconds == expires_at
+
+    def pop_expired(self, now: Optional[float] = None) -> List[int]:
+        now = time.time() if now is None else now
+        expired = []
+        while self._expiry_heap and self._expiry_heap[0][0] < now:
+            expires_at, discord_id = heapq.heappop(self._expiry_heap)
+            if self._is_current(expires_at, discord_id):
+                del self._entries[discord_id]
+                expired.append(discord_id)
+        return expired
+
+    def next_expiry(self) -> Optional[float]:
+        # Drop stale heap items so the head is a live entry
+        while self._expiry_heap and not self._is_current(*self._expiry_heap[0]):
+            heapq.heappop(self._expiry_heap)
+        return self._expiry_heap[0][0] if self._expiry_heap else None
+
+
+class SQLitePendingLinkStore(PendingLinkStore):
+    """
+    Pending link store persisted to a SQLite database.
+
+    Pending verifications survive restarts. An index on the expiry column
+    lets pop_expired() and next_expiry() avoid scanning the whole table.
+    The database runs in WAL mode, so several bot processes (e.g. shards)
+    can share it: a link started on one can be completed on another. The
+    async methods run queries on a worker thread, since waiting up to
+    `busy_timeout` for another process's lock would otherwise block the
+    event loop.
+    """
+
+    def __init__(self, expiry_seconds: float, path: str, busy_timeout: float = 5.0):
+        super().__init__(expiry_seconds)
+        self.path = path
+        # Serialises use of the connection between the event loop and worker threads
+        self._lock = threading.Lock()
+        self._count = 0
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pending_links ("
+                "discord_id INTEGER PRIMARY KEY, identifier TEXT NOT NULL, code TEXT NOT NULL, "
+                "ts REAL NOT NULL, user_id INTEGER NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS pending_links_expires_at ON pending_links (expires_at)"
+            )
+
+    @staticmethod
+    def _entry(row: sqlite3.Row) -> PendingLink:
+        return {"identifier": row["identifier"], "code": row["code"], "ts": row["ts"], "user_id": row["user_id"]}
+
+    def __getitem__(self, discord_id: int) -> PendingLink:
+        row = self._conn.execute(
+            "SELECT identifier, code, ts, user_id FROM pending_links WHERE discord_id = ?", (discord_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(discord_id)
+        return self._entry(row)
+
+    def __setitem__(self, discord_id: int, entry: PendingLink):
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pending_links (discord_id, identifier, code, ts, user_id, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (discord_id, entry["identifier"], entry["code"], entry["ts"], entry["user_id"],
+                 entry["ts"] + self.expiry_seconds),
+            )
+
+    def __delitem__(self, discord_id: int):
+        with self._conn:
+            cursor = self._conn.execute("DELETE FROM pending_links WHERE discord_id = ?", (discord_id,))
+        if cursor.rowcount == 0:
+            raise KeyError(discord_id)
+
+    def __contains__(self, discord_id: int) -> bool:
+        row = self._conn.execute("SELECT 1 FROM pending_links WHERE discord_id = ?", (discord_id,)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        # Read by the metrics endpoint on the event loop: rather than wait for a
+        # worker thread, report the last count seen
+        if self._lock.acquire(blocking=False):
+            try:
+                self._count = self._conn.execute("SELECT COUNT(*) FROM pending_links").fetchone()[0]
+            except sqlite3.OperationalError:
+                pass
+            finally:
+                self._lock.release()
+        return self._count
+
+    def items(self) -> Iterator[Tuple[int, PendingLink]]:
+        rows = self._conn.execute("SELECT * FROM pending_links ORDER BY expires_at").fetchall()
+        return iter([(row["discord_id"], self._entry(row)) for row in rows])
+
+    def discord_ids_for_user(self, user_id: int) -> List[int]:
+        rows = self._conn.execute("SELECT discord_id FROM pending_links WHERE user_id = ?", (user_id,)).fetchall()
+        return [row["discord_id"] for row in rows]
+
+    def pop_expired(self, now: Optional[float] = None) -> List[int]:
+        now = time.time() if now is None else now
+        with self._conn:
+            rows = self._conn.execute(
+                "SELECT discord_id FROM pending_links WHERE expires_at < ?", (now,)
+            ).fetchall()
+            self._conn.execute("DELETE FROM pending_links WHERE expires_at < ?", (now,))
+        return [row["discord_id"] for row in rows]
+
+    def next_expiry(self) -> Optional[float]:
+        return self._conn.execute("SELECT MIN(expires_at) FROM pending_links").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    async def _run(self, func: Callable[..., Any], *args) -> Any:
+        return await asyncio.to_thread(self._locked, func, *args)
+
+    def _locked(self, func: Callable[..., Any], *args) -> Any:
+        with self._lock:
+            return func(*args)
+
+
+def create_pending_store(backend: str, expiry_seconds: float, path: str) -> PendingLinkStore:
+    """
+    Create the pending link store selected in config.
+
+    Args:
+        backend: "memory" or "sqlite".
+        expiry_seconds: How long a pending link stays valid.
+        path: Database file for the SQLite backend.
+
+    Returns:
+        The configured PendingLinkStore.
+
+    Raises:
+        ValueError: If the backend name is not recognised.
+    """
+    if backend == "memory":
+        return InMemoryPendingLinkStore(expiry_seconds)
+    if backend == "sqlite":
+        return SQLitePendingLinkStore(expiry_seconds, path)
+    raise ValueError(f"Unknown PENDING_STORE backend: {backend!r} (expected 'memory' or 'sqlite')")
@@ -0,0 +1,206 @@
+"""
+Rate limiting, retries and circuit breaking for Overseerr requests.
+
+These are plain, thread-safe building blocks. They decide how long to wait
+and whether to try again; the sync and async clients do the actual sleeping
+and sending, so the same limiter and breaker can be shared by both.
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+# Statuses treated as transient server-side failures
+RETRYABLE_STATUSES = frozenset({500, 502, 503, 504})
+
+
+class OverseerrUnavailableError(Exception):
+    """
+    Overseerr could not be reached, is overloaded, or is failing.
+
+    Raised instead of returning "not found" so callers can tell users to try
+    again later. `retry_after` is a hint, in seconds, when one is known.
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header (delay in seconds or an HTTP date).
+
+    Returns:
+        Seconds to wait, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Client-side rate limiter that backs off when the server pushes back.
+
+    Tokens refill at `rate` per second up to `burst`. A 429 halves the rate
+    (down to `min_rate`) and pauses all requests for the Retry-After period;
+    each success then raises the rate a little, back up to `max_rate`. With
+    `max_rate` of 0 requests are only paused after a 429, never throttled.
+    """
+
+    def __init__(self, max_rate: float, burst: int, min_rate: float = 1.0):
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate) if max_rate > 0 else 0.0
+        self.rate = max_rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: Optional[float] = None) -> float:
+        """
+        Take one token, unless the wait for it would be too long.
+
+        Args:
+            max_wait: Longest acceptable wait. If the caller would have to
+                wait longer, no token is taken, so refusing the request
+                costs later callers nothing.
+
+        Returns:
+            Seconds the caller must wait before sending its request. A value
+            over `max_wait` means no token was taken.
+        """
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._paused_until - now)
+            if self.rate > 0:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens < 1:
+                    delay = max(delay, (1 - self._tokens) / self.rate)
+            if max_wait is not None and delay > max_wait:
+                return delay
+            if self.rate > 0:
+                self._tokens -= 1
+            return delay
+
+    def throttled(self, retry_after: Optional[float] = None):
+        """Record a 429: halve the rate and pause until Retry-After has passed."""
+        with self._lock:
+            now = time.monotonic()
+            # Requests already in flight when the first 429 arrived will see one
+            # too; only the first of them should cut the rate
+            if self.rate > 0 and now >= self._paused_until:
+                self.rate = max(self.min_rate, self.rate / 2)
+            pause = retry_after if retry_after is not None else (1 / self.rate if self.rate > 0 else 1.0)
+            self._paused_until = max(self._paused_until, now + pause)
+
+    def succeeded(self):
+        """Record a successful request, recovering the rate towards max_rate."""
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
+
+
+class CircuitBreaker:
+    """
+    Fail fast while Overseerr is down.
+
+    After `failure_threshold` consecutive transient failures the breaker
+    opens and requests are refused for `reset_timeout` seconds. It then lets
+    a single probe request through: success closes it, failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def allow(self) -> bool:
+        """Return True if a request may be sent now."""
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return True
+            if state == self.OPEN:
+                return False
+            # Half-open: one probe at a time (a probe that never reports back
+            # is given up on after another reset_timeout)
+            now = time.monotonic()
+            if self._probe_started is None or now - self._probe_started >= self.reset_timeout:
+                self._probe_started = now
+                return True
+            return False
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker will let a probe through."""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._probe_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probe_started is not None or self.failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._probe_started = None
+
+
+class RetryPolicy:
+    """Bounded retries with full-jitter exponential backoff."""
+
+    def __init__(self, attempts: int, base_delay: float, max_delay: float):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Work out how long to wait before retrying.
+
+        Args:
+            attempt: The attempt that just failed, starting at 0.
+            retry_after: Delay requested by the server, if any.
+
+        Returns:
+            Seconds to wait, or None if the request should not be retried
+            (attempts used up, or the server asked for a longer wait than
+            max_delay).
+        """
+        if attempt + 1 >= self.attempts:
+            return None
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_delay else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
@@ -0,0 +1,128 @@
+"""
+State shared between bot processes.
+
+When the bot is sharded across several processes, one of them holds the
+directory sync lease: it syncs the user directory and Discord ID index with
+Overseerr and publishes them here, and the others load what it published
+instead of each querying Overseerr themselves. If that process stops, its
+lease expires and another one takes over.
+
+Stores are simple key-value stores with leases. The SQLite store runs in WAL
+mode, so any number of processes on one host can read while one writes;
+other backends can be plugged in by implementing SharedStateStore. Calls
+may block (e.g. waiting for another process's lock), so the bot makes them
+from a worker thread; stores must therefore be thread-safe.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+class LeaseLostError(Exception):
+    """Another process took over a lease while its holder was still working."""
+
+
+class SharedStateStore:
+    """
+    Base class for shared key-value stores.
+
+    Subclasses implement get(), set() and acquire_lease().
+    """
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the value stored under `key`, or None."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes):
+        """Store `value` under `key`, replacing any previous value."""
+        raise NotImplementedError
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """
+        Take or renew a named lease.
+
+        Args:
+            name: The lease to take.
+            owner: Identifies the calling process.
+            ttl: Seconds until the lease expires unless renewed.
+
+        Returns:
+            True if `owner` now holds the lease, False if another owner's
+            lease has not expired yet.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the store."""
+
+
+class SQLiteSharedStateStore(SharedStateStore):
+    """
+    Shared state in a SQLite database, for processes on the same host.
+
+    The database is switched to WAL mode, and writers wait up to
+    `busy_timeout` seconds for a lock instead of failing.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS shared_state (key TEXT PRIMARY KEY, value BLOB NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, "
+                "expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM shared_state WHERE key = ?", (key,)).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def set(self, key: str, value: bytes):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO shared_state (key, value) VALUES (?, ?)", (key, value))
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock, self._conn:
+            # Only takes the lease if it is free, expired, or already ours
+            self._conn.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.owner = excluded.owner OR leases.expires_at < ?",
+                (name, owner, now + ttl, now),
+            )
+            row = self._conn.execute("SELECT owner FROM leases WHERE name = ?", (name,)).fetchone()
+        return row is not None and row[0] == owner
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_shared_state(backend: str, path: str) -> Optional[SharedStateStore]:
+    """
+    Create the shared state store selected in config.
+
+    Args:
+        backend: "none" to run a single independent process, or "sqlite".
+        path: Database file for the SQLite backend.
+
+    Returns:
+        The configured SharedStateStore, or None if disabled.
+
+    Raises:
+        ValueError: If the backend name is not recognised.
+    """
+    if backend == "none":
+        return None
+    if backend == "sqlite":
+        return SQLiteSharedStateStore(path)
+    raise ValueError(f"Unknown SHARED_STATE backend: {backend!r} (expected 'none' or 'sqlite')")
@@ -0,0 +1,60 @@
+"""
+Request coalescing for concurrent identical calls.
+
+When several coroutines ask for the same resource at the same time, only the
+first one does the work; the rest wait for and share its result.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Share one in-flight call between concurrent callers with the same key.
+
+    Results are not cached: once a call finishes, the next caller for that key
+    starts a new one.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        """Number of calls currently in flight."""
+        return len(self._calls)
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Return True if a call for `key` is currently running."""
+        return key in self._calls
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `func`, or join the call already running for `key`.
+
+        The shared call is shielded, so one caller being cancelled does not
+        cancel it for the others.
+
+        Args:
+            key: Identifies the resource being fetched.
+            func: Zero-argument coroutine function that fetches it.
+
+        Returns:
+            The result of the (possibly shared) call.
+
+        Raises:
+            Whatever exception the shared call raised.
+        """
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(future)
+
+    def _finish(self, key: Hashable, future: asyncio.Future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            # Mark the exception as retrieved in case every caller was cancelled
+            future.exception()
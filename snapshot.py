@@ -0,0 +1,205 @@
+"""
+On-disk snapshots of the user directory and Discord ID index.
+
+A snapshot lets the bot start with the directory and index it had when it
+last ran, so a restart only revalidates what changed instead of re-reading
+every user's notification settings.
+
+File layout:
+
+    HERMES-SNAPSHOT\n
+    {"version": 1, "created_at": ..., "length": ..., "sha256": ...}\n
+    <zlib-compressed JSON Lines payload>
+
+The header records the payload's length and SHA-256, so a truncated or
+corrupted file is rejected instead of loaded. Payload lines are either
+{"page": skip, "etag": ..., "data": <raw /user response>} or an index entry
+[user_id, discord_id, checked_at]. Files are written to a temporary file
+and renamed into place, so a crash mid-write never leaves a partial snapshot.
+The same encoding is used to share the directory between bot processes
+through the shared state store.
+"""
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import time
+import zlib
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+MAGIC = b"HERMES-SNAPSHOT\n"
+SNAPSHOT_VERSION = 1
+
+# Bytes read per chunk when loading
+_CHUNK_SIZE = 1 << 16
+
+IndexEntry = Tuple[int, Optional[str], float]
+
+
+class SnapshotError(Exception):
+    """The snapshot file is missing, corrupt, or from an incompatible version."""
+
+
+def _payload_lines(pages: Dict[int, Dict], etags: Dict[int, str], index: List[IndexEntry]) -> Iterator[bytes]:
+    for skip, data in pages.items():
+        yield json.dumps({"page": skip, "etag": etags.get(skip), "data": data}, separators=(",", ":")).encode()
+    for entry in index:
+        yield json.dumps(list(entry), separators=(",", ":")).encode()
+
+
+def encode_snapshot(pages: Dict[int, Dict], etags: Dict[int, str], index: List[IndexEntry],
+                    index_ready: bool) -> bytes:
+    """
+    Encode a snapshot.
+
+    Args:
+        pages: Raw /user responses keyed by skip offset.
+        etags: ETags of those pages keyed by skip offset.
+        index: Discord ID index entries as (user ID, Discord ID or None, checked-at time).
+        index_ready: Whether every user in the directory had been checked.
+
+    Returns:
+        The complete snapshot, header included.
+    """
+    compressor = zlib.compressobj(level=6)
+    chunks = []
+    for line in _payload_lines(pages, etags, index):
+        chunks.append(compressor.compress(line + b"\n"))
+    chunks.append(compressor.flush())
+    payload = b"".join(chunks)
+
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "created_at": time.time(),
+        "index_ready": index_ready,
+        "length": len(payload),
+        "sha256": hashlib.sha256(payload).hexdigest(),
+    }
+    return MAGIC + json.dumps(header).encode() + b"\n" + payload
+
+
+def save_snapshot(path: str, pages: Dict[int, Dict], etags: Dict[int, str], index: List[IndexEntry],
+                  index_ready: bool):
+    """
+    Write a snapshot file atomically.
+
+    Args:
+        path: Destination file.
+        pages, etags, index, index_ready: As for encode_snapshot().
+
+    Raises:
+        OSError: If the file cannot be written.
+    """
+    data = encode_snapshot(pages, etags, index, index_ready)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_snapshot(path: str) -> Dict:
+    """
+    Read and verify a snapshot file, streaming and decompressing it chunk by chunk.
+
+    Args:
+        path: Snapshot file to read.
+
+    Returns:
+        Dictionary with "created_at", "index_ready", "pages", "etags" and
+        "index" keys, in the shapes save_snapshot() accepts.
+
+    Raises:
+        SnapshotError: If the file is missing, unreadable, corrupt, or from
+            another version.
+    """
+    try:
+        with open(path, "rb") as f:
+            return _read_snapshot(f, path)
+    except FileNotFoundError:
+        raise SnapshotError(f"No snapshot at {path}")
+    except OSError as e:
+        raise SnapshotError(f"Cannot read snapshot {path}: {e}")
+
+
+def decode_snapshot(data: bytes, name: str = "snapshot") -> Dict:
+    """
+    Verify and decode a snapshot returned by encode_snapshot().
+
+    Args:
+        data: The encoded snapshot.
+        name: Describes where it came from, for error messages.
+
+    Returns:
+        As for load_snapshot().
+
+    Raises:
+        SnapshotError: If the data is corrupt or from another version.
+    """
+    return _read_snapshot(io.BytesIO(data), name)
+
+
+def _read_snapshot(f: BinaryIO, name: str) -> Dict:
+    if f.readline() != MAGIC:
+        raise SnapshotError(f"{name} is not a Hermes snapshot")
+    try:
+        header = json.loads(f.readline())
+    except ValueError:
+        raise SnapshotError(f"{name} has a corrupt header")
+    if header.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"{name} is snapshot version {header.get('version')}, expected {SNAPSHOT_VERSION}")
+
+    digest = hashlib.sha256()
+    decompressor = zlib.decompressobj()
+    pages: Dict[int, Dict] = {}
+    etags: Dict[int, str] = {}
+    index: List[IndexEntry] = []
+    length = 0
+    buffer = b""
+
+    def consume(data: bytes) -> bytes:
+        lines = data.split(b"\n")
+        for line in lines[:-1]:
+            record = json.loads(line)
+            if isinstance(record, dict):
+                pages[record["page"]] = record["data"]
+                if record.get("etag"):
+                    etags[record["page"]] = record["etag"]
+            else:
+                user_id, discord_id, checked_at = record
+                index.append((user_id, discord_id, checked_at))
+        return lines[-1]
+
+    try:
+        while True:
+            chunk = f.read(_CHUNK_SIZE)
+            if not chunk:
+                break
+            length += len(chunk)
+            digest.update(chunk)
+            buffer = consume(buffer + decompressor.decompress(chunk))
+        buffer = consume(buffer + decompressor.flush())
+    except (zlib.error, ValueError, KeyError, TypeError) as e:
+        raise SnapshotError(f"{name} is corrupt: {e}")
+
+    if length != header.get("length") or digest.hexdigest() != header.get("sha256") or buffer:
+        raise SnapshotError(f"{name} failed its checksum")
+
+    return {
+        "created_at": header.get("created_at"),
+        "index_ready": bool(header.get("index_ready")),
+        "pages": pages,
+        "etags": etags,
+        "index": index,
+    }
@@ -0,0 +1,346 @@
+"""
+In-memory indexes over Overseerr users.
+
+Keeps lookups that would otherwise require scanning every Overseerr user
+(e.g. "which user is linked to this Discord ID?") down to dictionary hits.
+"""
+
+import heapq
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Dict, List, Set, Tuple
+
+
+class DiscordIndex:
+    """
+    Reverse index from Discord ID to Overseerr user ID.
+
+    Every user whose notification settings have been checked is recorded along
+    with the time of the check, so the index can be refreshed incrementally by
+    re-checking the stalest entries first.
+
+    Discord IDs a lookup found unlinked can be recorded in `unlinked`, a small
+    LRU cache with a short TTL; an entry is dropped as soon as the index sees
+    that Discord ID linked.
+    """
+
+    def __init__(self, miss_size: int = 1024, miss_ttl: float = 60):
+        self._user_by_discord: Dict[str, int] = {}
+        self._discord_by_user: Dict[int, Optional[str]] = {}
+        self._checked_at: Dict[int, float] = {}
+        self.ready = False
+        self.unlinked = TTLCache(maxsize=miss_size, ttl=miss_ttl)
+
+    def __len__(self) -> int:
+        """Number of linked Discord IDs in the index."""
+        return len(self._user_by_discord)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._discord_by_user
+
+    def lookup(self, discord_id: str) -> Optional[int]:
+        """Return the Overseerr user ID linked to a Discord ID, if known."""
+        return self._user_by_discord.get(str(discord_id))
+
+    def discord_id_for(self, user_id: int) -> Optional[str]:
+        """Return the Discord ID linked to an Overseerr user, if known."""
+        return self._discord_by_user.get(user_id)
+
+    def update(self, user_id: int, discord_id: Optional[str]):
+        """
+        Record the Discord ID currently stored for an Overseerr user.
+
+        Args:
+            user_id: The Overseerr user ID.
+            discord_id: The linked Discord ID, or None if the user is not linked.
+        """
+        discord_id = str(discord_id) if discord_id else None
+
+        previous = self._discord_by_user.get(user_id)
+        if previous and self._user_by_discord.get(previous) == user_id:
+            del self._user_by_discord[previous]
+
+        self._discord_by_user[user_id] = discord_id
+        self._checked_at[user_id] = time.time()
+        if discord_id:
+            self._user_by_discord[discord_id] = user_id
+            self.unlinked.discard(discord_id)
+
+    def remove_user(self, user_id: int):
+        """Forget an Overseerr user (e.g. one deleted from Overseerr)."""
+        discord_id = self._discord_by_user.pop(user_id, None)
+        self._checked_at.pop(user_id, None)
+        if discord_id and self._user_by_discord.get(discord_id) == user_id:
+            del self._user_by_discord[discord_id]
+
+    def user_ids(self) -> Set[int]:
+        """Return the IDs of every user that has been checked."""
+        return set(self._discord_by_user)
+
+    def stalest(self, count: int) -> List[int]:
+        """Return up to `count` user IDs with the oldest checks."""
+        return heapq.nsmallest(count, self._checked_at, key=self._checked_at.get)
+
+    def entries(self) -> List[Tuple[int, Optional[str], float]]:
+        """Return every checked user as (user ID, Discord ID or None, checked-at time)."""
+        return [(user_id, discord_id, self._checked_at[user_id])
+                for user_id, discord_id in self._discord_by_user.items()]
+
+    def restore(self, entries: List[Tuple[int, Optional[str], float]]):
+        """
+        Load entries previously returned by entries(), keeping their check times.
+
+        Entries older than this index's own check of the same user are ignored.
+        """
+        for user_id, discord_id, checked_at in entries:
+            if self._checked_at.get(user_id, float("-inf")) > checked_at:
+                continue
+            self.update(user_id, discord_id)
+            self._checked_at[user_id] = checked_at
+
+
+class UserDirectory:
+    """
+    Cached copy of the Overseerr user list with case-insensitive lookups.
+
+    Users are indexed by lowercased Plex username, email and display name, so
+    find() is a dictionary hit instead of a scan. The raw /user pages and their
+    ETags are kept so a refresh can revalidate with conditional requests.
+
+    Identifiers that matched no user can be recorded in `not_found`, a small
+    LRU cache with a short TTL; entries are dropped when a refresh brings in
+    a new or changed user with that name, email or display name.
+    """
+
+    # Fields find() matches against, in priority order
+    LOOKUP_FIELDS = ("plexUsername", "email", "displayName")
+
+    def __init__(self, ttl: float, miss_size: int = 1024, miss_ttl: float = 60):
+        self.ttl = ttl
+        self.not_found = TTLCache(maxsize=miss_size, ttl=miss_ttl)
+        self.loaded_at: Optional[float] = None
+        # Raw /user responses and ETags keyed by the page's skip offset
+        self.pages: Dict[int, Dict] = {}
+        self.etags: Dict[int, str] = {}
+        self._users: Dict[int, Dict] = {}
+        # Latest updatedAt of any cached user, where delta syncs resume from
+        self.high_water_mark: Optional[str] = None
+        # Lookups served without / requiring a refresh
+        self.hits = 0
+        self.misses = 0
+        self._by_field: Dict[str, Dict[str, int]] = {field: {} for field in self.LOOKUP_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def is_fresh(self) -> bool:
+        """Return True if the directory was loaded within the TTL."""
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl
+
+    def invalidate(self):
+        """Mark the directory stale so the next lookup refreshes it."""
+        self.loaded_at = None
+
+    def replace(self, users: List[Dict]) -> Set[int]:
+        """
+        Replace the cached users and rebuild the lookup indexes.
+
+        Args:
+            users: Every user returned by the Overseerr /user endpoint.
+
+        Returns:
+            IDs of users that are new or have changed since the previous
+            copy, judged by their updatedAt timestamp when Overseerr
+            provides one.
+        """
+        previous = self._users
+        changed: Set[int] = set()
+        self._users = {}
+        self._by_field = {field: {} for field in self.LOOKUP_FIELDS}
+
+        for user in users:
+            user_id = user.get("id")
+            if user_id is None:
+                continue
+            self._users[user_id] = user
+            old = previous.get(user_id)
+            if old is None or (old.get("updatedAt") or old) != (user.get("updatedAt") or user):
+                changed.add(user_id)
+            for field, index in self._by_field.items():
+                value = user.get(field)
+                if value:
+                    # Keep the first match, as a linear scan would
+                    index.setdefault(value.lower(), user_id)
+
+        self.high_water_mark = max((user.get("updatedAt") or "" for user in users), default="") or None
+        self.loaded_at = time.monotonic()
+        self._forget_misses(changed)
+        return changed
+
+    def upsert(self, users: List[Dict]) -> Set[int]:
+        """
+        Add or update individual users, e.g. those returned by a delta sync.
+
+        Updated users are patched into the raw pages too, so snapshots and
+        shared state include them. New users are appended to the last page
+        and its ETag dropped, so the next full refresh re-reads it.
+
+        Args:
+            users: Users to add or update.
+
+        Returns:
+            IDs of users that are new or changed.
+        """
+        changed: Set[int] = set()
+        for user in users:
+            user_id = user.get("id")
+            if user_id is None:
+                continue
+            old = self._users.get(user_id)
+            if old == user:
+                continue
+            changed.add(user_id)
+            self._users[user_id] = user
+            for field, index in self._by_field.items():
+                old_value = (old or {}).get(field)
+                if old_value and old_value != user.get(field) and index.get(old_value.lower()) == user_id:
+                    del index[old_value.lower()]
+                    # Another user may share the old value
+                    key = old_value.lower()
+                    for other_id, other in self._users.items():
+                        if (other.get(field) or "").lower() == key:
+                            index[key] = other_id
+                            break
+                value = user.get(field)
+                if value:
+                    index.setdefault(value.lower(), user_id)
+            updated_at = user.get("updatedAt")
+            if updated_at and (self.high_water_mark is None or updated_at > self.high_water_mark):
+                self.high_water_mark = updated_at
+        if changed:
+            self._patch_pages({user_id: self._users[user_id] for user_id in changed})
+            self._forget_misses(changed)
+        return changed
+
+    def _forget_misses(self, user_ids: Set[int]):
+        """Drop cached misses that the given users would now match."""
+        if not len(self.not_found):
+            return
+        for user_id in user_ids:
+            user = self._users[user_id]
+            for field in self.LOOKUP_FIELDS:
+                if user.get(field):
+                    self.not_found.discard(user[field].lower())
+
+    def _patch_pages(self, users: Dict[int, Dict]):
+        remaining = dict(users)
+        for data in self.pages.values():
+            results = data.get("results", [])
+            for position, user in enumerate(results):
+                if user.get("id") in remaining:
+                    results[position] = remaining.pop(user["id"])
+        if remaining and self.pages:
+            last = max(self.pages)
+            self.pages[last].setdefault("results", []).extend(remaining.values())
+            self.etags.pop(last, None)
+
+    def restore(self, pages: Dict[int, Dict], etags: Dict[int, str], age: Optional[float] = None):
+        """
+        Load /user pages saved by an earlier run or another process.
+
+        The restored users can be looked up straight away. Unless `age` is
+        given the directory counts as stale, so the next lookup or sync
+        revalidates every page.
+
+        Args:
+            pages: Raw /user responses keyed by skip offset.
+            etags: ETags of those pages keyed by skip offset.
+            age: Seconds since the pages were fetched, if they are known to be current.
+        """
+        self.pages = pages
+        self.etags = etags
+        self.replace([user for data in pages.values() for user in data.get("results", [])])
+        if age is None:
+            self.loaded_at = float("-inf")
+        else:
+            self.touch(age)
+
+    def touch(self, age: float = 0.0):
+        """Mark the directory as revalidated `age` seconds ago."""
+        self.loaded_at = time.monotonic() - max(0.0, age)
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        """Return a cached user by Overseerr user ID."""
+        return self._users.get(user_id)
+
+    def find(self, identifier: str) -> Optional[Dict]:
+        """
+        Find a cached user by Plex username, email or display name.
+
+        Args:
+            identifier: The identifier to look up (case-insensitive).
+
+        Returns:
+            User dictionary if found, None otherwise.
+        """
+        identifier_lower = identifier.lower()
+        for field in self.LOOKUP_FIELDS:
+            user_id = self._by_field[field].get(identifier_lower)
+            if user_id is not None:
+                return self._users[user_id]
+        return None
+
+    def users(self) -> List[Dict]:
+        """Return every cached user."""
+        return list(self._users.values())
+
+    def user_ids(self) -> Set[int]:
+        """Return the IDs of every cached user."""
+        return set(self._users)
+
+
+class TTLCache:
+    """
+    Small LRU cache whose entries expire after a fixed time.
+
+    Holds at most `maxsize` entries; the least recently used entry is evicted
+    first.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for `key`, or `default` if absent or expired."""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        """Cache a value, evicting the least recently used entry if full."""
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: Hashable):
+        """Remove a cached value if present."""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove every cached value."""
+        self._entries.clear()
@@ -0,0 +1,164 @@
+"""
+Embedded HTTP receiver for Overseerr webhook notifications.
+
+Overseerr's webhook agent POSTs a JSON payload for each notification. The
+receiver pulls out which Overseerr user the event concerns and hands that to
+a callback, so the bot can re-check pending verifications for that one user
+instead of scanning the whole directory.
+"""
+
+import asyncio
+import hmac
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Sections of Overseerr's default webhook template and the prefix used for
+# the user fields inside each one (e.g. request.requestedBy_email)
+_USER_SECTIONS = {"request": "requestedBy", "issue": "reportedBy", "comment": "commentedBy"}
+
+UserEventCallback = Callable[[Set[int], Set[str]], Awaitable[None]]
+
+
+def extract_user_refs(payload: Dict) -> Tuple[Set[int], Set[str]]:
+    """
+    Find the Overseerr users a webhook payload refers to.
+
+    Understands Overseerr's default webhook template (requestedBy_*,
+    reportedBy_* and commentedBy_* fields) as well as a minimal
+    {"userId": 123} or {"user": {"id": 123}} payload, which custom templates
+    or other automation can send.
+
+    Args:
+        payload: The decoded JSON body of the webhook.
+
+    Returns:
+        Tuple of (Overseerr user IDs, usernames/emails) mentioned in the payload.
+    """
+    user_ids: Set[int] = set()
+    identifiers: Set[str] = set()
+
+    def add_id(value):
+        try:
+            user_ids.add(int(value))
+        except (TypeError, ValueError):
+            pass
+
+    add_id(payload.get("userId", payload.get("user_id")))
+    user = payload.get("user")
+    if isinstance(user, dict):
+        add_id(user.get("id"))
+        for field in ("plexUsername", "email", "username"):
+            if user.get(field):
+                identifiers.add(str(user[field]))
+
+    for section, prefix in _USER_SECTIONS.items():
+        data = payload.get(section)
+        if not isinstance(data, dict):
+            continue
+        for field in ("username", "email"):
+            value = data.get(f"{prefix}_{field}")
+            if value:
+                identifiers.add(str(value))
+
+    return user_ids, identifiers
+
+
+class WebhookReceiver:
+    """
+    aiohttp server that accepts Overseerr webhooks on the bot's event loop.
+
+    Events are acknowledged immediately and processed in the background, so
+    a slow Overseerr lookup never makes Overseerr's webhook call time out.
+    A single worker handles them: users named while it is busy are merged
+    into its next batch, so a burst of events about one user costs one
+    check, and once `max_queued` users are waiting further events are
+    refused with 503.
+    """
+
+    def __init__(self, host: str, port: int, on_user_event: UserEventCallback,
+                 secret: Optional[str] = None, path: str = "/webhook", max_queued: int = 1000):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.secret = secret
+        self.on_user_event = on_user_event
+        self.max_queued = max_queued
+        self._runner: Optional[web.AppRunner] = None
+        # Users named by events not yet handed to on_user_event
+        self._queued_ids: Set[int] = set()
+        self._queued_identifiers: Set[str] = set()
+        self._worker: Optional[asyncio.Task] = None
+
+    def make_app(self) -> web.Application:
+        """Build the aiohttp application serving the webhook route."""
+        app = web.Application()
+        app.router.add_post(self.path, self._handle)
+        return app
+
+    async def start(self):
+        """Start listening for webhooks."""
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Port 0 picks a free port
+        self.port = self._runner.addresses[0][1]
+        logger.info(f"Webhook receiver listening on http://{self.host}:{self.port}{self.path}")
+
+    async def stop(self):
+        """Stop the server and wait for queued events to finish."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        await self.join()
+
+    async def join(self):
+        """Wait until every queued event has been handled."""
+        while self._worker is not None and not self._worker.done():
+            await asyncio.gather(self._worker, return_exceptions=True)
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        # Overseerr sends its configured "Authorization Header" value verbatim
+        if self.secret and not hmac.compare_digest(
+                request.headers.get("Authorization", "").encode(), self.secret.encode()):
+            return web.Response(status=401)
+
+        try:
+            payload = await request.json()
+        except ValueError:
+            return web.Response(status=400, text="Expected a JSON body")
+        if not isinstance(payload, dict):
+            return web.Response(status=400, text="Expected a JSON object")
+
+        user_ids, identifiers = extract_user_refs(payload)
+        new_ids = user_ids - self._queued_ids
+        new_identifiers = identifiers - self._queued_identifiers
+        if not new_ids and not new_identifiers:
+            return web.Response(status=202)
+        if self.queued + len(new_ids) + len(new_identifiers) > self.max_queued:
+            logger.warning(f"Refusing webhook event: {self.queued} user(s) already queued")
+            return web.Response(status=503, headers={"Retry-After": "5"})
+
+        self._queued_ids |= new_ids
+        self._queued_identifiers |= new_identifiers
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain())
+        return web.Response(status=202)
+
+    @property
+    def queued(self) -> int:
+        """Number of users waiting to be handed to on_user_event."""
+        return len(self._queued_ids) + len(self._queued_identifiers)
+
+    async def _drain(self):
+        while self._queued_ids or self._queued_identifiers:
+            user_ids, identifiers = self._queued_ids, self._queued_identifiers
+            self._queued_ids, self._queued_identifiers = set(), set()
+            try:
+                await self.on_user_event(user_ids, identifiers)
+            except Exception:
+                logger.exception("Failed to process webhook event")